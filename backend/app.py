@@ -1,3 +1,6 @@
+import time
+IMPORT_STARTED = time.perf_counter()
+
 import random
 import os
 from dotenv import load_dotenv
@@ -8,78 +11,133 @@ from flask import Flask, request, jsonify
 from flask_jwt_extended import JWTManager, create_access_token
 from flask_cors import CORS
 from werkzeug.security import generate_password_hash, check_password_hash
-from extensions import db
-from models import User, Tools
+from extensions import db, docker_manager, inventory, system_sampler, metrics, activity_feed, stats_hub, jobs, pull_manager, elevation, user_cache
+from models import User, Tools, SCHEMA_VERSION
 from config import Config
-
-from auth.routes import auth_bp
-from container.container.routes import container_bp
-from container.network.routes import network_bp
-from container.volume.routes import volume_bp
-from server.routes import server_bp
-from infrastructure.routes import infrastructure_bp
-from dashboard.routes import dashboard_bp
+from services.database import init_database, schema_version, set_schema_version
+from services.startup import StartupReport
+from auth.users import lookup_jwt_user
 
 from waitress import serve
 from datetime import datetime, timezone
+import importlib
+import threading
 
 dotenv_path = Path(__file__).parent.parent / '.env'
 load_dotenv(dotenv_path)
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+
+BLUEPRINTS = (
+    ('auth.routes', 'auth_bp'),
+    ('server.routes', 'server_bp'),
+    ('container.container.routes', 'container_bp'),
+    ('infrastructure.routes', 'infrastructure_bp'),
+    ('container.network.routes', 'network_bp'),
+    ('container.volume.routes', 'volume_bp'),
+    ('dashboard.routes', 'dashboard_bp'),
+)
+
+def register_blueprints(app, report):
+    for module_name, blueprint_name in BLUEPRINTS:
+        with report.measure(f"import {module_name}"):
+            blueprint = getattr(importlib.import_module(module_name), blueprint_name)
+        with report.measure(f"register {blueprint_name}"):
+            app.register_blueprint(blueprint)
+
+def seed_database():
+    db.create_all()
+    admin_user = User.query.filter_by(username='admin').first()
+    if not admin_user:
+        hashed_password = generate_password_hash('admin')
+        admin_user = User(
+            username='admin',
+            password=hashed_password,
+            email='admin@orchestrix.io',
+            created_at=datetime.now(timezone.utc),
+            updated_at=datetime.now(timezone.utc)
+        )
+        db.session.add(admin_user)
+        db.session.commit()
+
+    if not Tools.query.all():
+        tools = [
+            Tools(name='docker', installed=False),
+        ]
+        db.session.bulk_save_objects(tools)
+        db.session.commit()
+
+def start_background_services(app):
+    # Started at boot so history and activity cover the time before anyone
+    # opens the UI, but off the startup path so a slow Docker daemon does
+    # not hold it up.
+    def start():
+        try:
+            if inventory.enabled:
+                inventory.start()
+                activity_feed.start()
+            system_sampler.start()
+        except Exception as e:
+            app.logger.error(f"Failed to start background services: {str(e)}")
+
+    threading.Thread(target=start, name='background-services', daemon=True).start()
 
 def create_app():
+    report = StartupReport(IMPORT_SECONDS)
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.extensions['startup_report'] = report
 
-    db.init_app(app)
-    jwt = JWTManager(app)
+    with report.measure("init extensions"):
+        db.init_app(app)
+        init_database(app, db)
+        docker_manager.init_app(app)
+        inventory.init_app(app)
+        system_sampler.init_app(app)
+        metrics.init_app(app)
+        activity_feed.init_app(app)
+        stats_hub.init_app(app)
+        jobs.init_app(app)
+        pull_manager.init_app(app)
+        elevation.init_app(app)
+        user_cache.init_app(app)
+        jwt = JWTManager(app)
+        jwt.user_lookup_loader(lookup_jwt_user)
 
     CORS(app, resources={
         r"/api/*": {
             "origins": [f"http://{os.getenv('NEXTJS_HOST')}:{os.getenv('NEXTJS_PORT')}"],
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"]
+            "allow_headers": ["Content-Type", "Authorization"],
+            "expose_headers": ["X-Next-Cursor", "X-Total-Count"]
         }
     })
 
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(server_bp)
-    app.register_blueprint(container_bp)
-    app.register_blueprint(infrastructure_bp)
-    app.register_blueprint(network_bp)
-    app.register_blueprint(volume_bp)
-    app.register_blueprint(dashboard_bp)
+    register_blueprints(app, report)
 
     with app.app_context():
-        db.create_all()
-        admin_user = User.query.filter_by(username='admin').first()
-        if not admin_user:
-            hashed_password = generate_password_hash('admin')
-            admin_user = User(
-                username='admin',
-                password=hashed_password,
-                email='admin@orchestrix.io',
-                created_at=datetime.now(timezone.utc),
-                updated_at=datetime.now(timezone.utc)
-            )
-            db.session.add(admin_user)
-            db.session.commit()
-
-        if not Tools.query.all():
-            tools = [
-                Tools(name='docker', installed=False),
-            ]
-            db.session.bulk_save_objects(tools)
-            db.session.commit()
+        with report.measure("schema check"):
+            current = schema_version(db) == SCHEMA_VERSION
+        if not current:
+            with report.measure("schema create and seed"):
+                seed_database()
+                set_schema_version(db, SCHEMA_VERSION)
+
+    start_background_services(app)
 
+    report.finish()
+    app.logger.info(f"Application created in {report.total_seconds:.3f}s")
     return app
 
 if __name__ == '__main__':
     app = create_app()
 
-    if os.getenv('FLASK_ENV') == 'development':
+    if app.config['SERVER_MODE'] == 'asgi':
+        from asgi import serve_asgi
+        serve_asgi(app, host=os.getenv('FLASK_HOST'), port=int(os.getenv('FLASK_PORT')))
+    elif os.getenv('FLASK_ENV') == 'development':
         app.run(debug=True, host=os.getenv('FLASK_HOST'), port=int(os.getenv('FLASK_PORT')))
     elif os.getenv('FLASK_ENV') == 'production':
-        serve(app, host=os.getenv('FLASK_HOST'), port=int(os.getenv('FLASK_PORT')))
+        serve(app, host=os.getenv('FLASK_HOST'), port=int(os.getenv('FLASK_PORT')), threads=app.config['WAITRESS_THREADS'])
     else:
         warnings.warn("FLASK_ENV must be set in environment variables", UserWarning)
         print(f'Invalid .env configuration')
@@ -0,0 +1,428 @@
+"""Optional ASGI serving mode.
+
+The Flask app is mounted through a2wsgi's WSGIMiddleware, which runs each
+request on a pool of ASGI_WSGI_WORKERS threads (like waitress does), while
+the long-lived streaming endpoints (log follow, stats, activity and job
+logs) are answered by native async handlers, so an idle viewer costs a
+coroutine and a socket instead of a server thread. Container streams are
+read with an asyncio Docker client; the activity feed and job logs, which
+are fed by background threads, are handed over to the event loop.
+
+Requires the optional packages in requirements-asgi.txt. Select it with
+SERVER_MODE=asgi when running app.py, or point any ASGI server at
+``asgi:create_asgi_app()`` (with ``--factory`` for uvicorn).
+"""
+import asyncio
+import json
+import logging
+import os
+import queue
+import re
+from urllib.parse import parse_qs
+
+from flask_jwt_extended import decode_token
+
+from services.async_docker import AsyncDockerClient, AsyncDockerError
+from services.async_stats import AsyncStatsHub
+from services.log_stream import LogCursor, LogLineFramer, parse_cursor
+from services.stats_hub import StatsCapacityError
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError:
+    WSGIMiddleware = None
+
+logger = logging.getLogger(__name__)
+
+SSE_HEADERS = [(b'cache-control', b'no-cache'), (b'x-accel-buffering', b'no')]
+INSTALL_HINT = "pip install -r requirements-asgi.txt"
+
+
+class LoopQueue:
+    """Bounded asyncio queue that other threads can put_nowait() onto.
+
+    Lets a thread-fed subscriber list (like the activity feed's) deliver to
+    a coroutine; items that arrive while the queue is full are dropped.
+    """
+
+    def __init__(self, loop, maxsize):
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=maxsize)
+
+    def put_nowait(self, item):
+        # Mirror queue.Queue for the producer, which treats Full as "missed".
+        if self._queue.full():
+            raise queue.Full
+        try:
+            self._loop.call_soon_threadsafe(self._put, item)
+        except RuntimeError:
+            # The loop has shut down; nobody is listening any more.
+            raise queue.Full
+
+    def _put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self):
+        return await self._queue.get()
+
+
+class Request:
+    def __init__(self, scope, receive, send, params):
+        self.scope = scope
+        self.receive = receive
+        self.send = send
+        self.params = params
+        self.args = {key: values[-1] for key, values in parse_qs(scope.get('query_string', b'').decode('latin-1')).items()}
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope.get('headers', [])}
+
+
+class OrchestrixASGI:
+    def __init__(self, flask_app):
+        if WSGIMiddleware is None:
+            raise RuntimeError(f"ASGI mode requires the a2wsgi package: {INSTALL_HINT}")
+        self.flask_app = flask_app
+        # Not asgiref's WsgiToAsgi: it runs every request on one shared
+        # thread, so a single open SSE would block the whole API.
+        self.wsgi = WSGIMiddleware(flask_app, workers=flask_app.config['ASGI_WSGI_WORKERS'])
+        self.docker = AsyncDockerClient.from_env()
+        self.stats_hub = AsyncStatsHub(
+            self.docker,
+            flask_app.config['STATS_IDLE_TIMEOUT'],
+            flask_app.config['STATS_SUBSCRIBER_QUEUE_SIZE'],
+            flask_app.config['STATS_MAX_STREAMS']
+        )
+        self.keepalive = flask_app.config['SSE_KEEPALIVE_SECONDS']
+        self.max_line_bytes = flask_app.config['LOG_STREAM_MAX_LINE_BYTES']
+        self.allowed_origin = f"http://{os.getenv('NEXTJS_HOST')}:{os.getenv('NEXTJS_PORT')}"
+        self.routes = [
+            (re.compile(r'^/api/containers/logs/(?P<container_id>[^/]+)/stream$'), self.stream_container_logs),
+            (re.compile(r'^/api/containers/stats/(?P<container_id>[^/]+)/stream$'), self.stream_container_stats),
+            (re.compile(r'^/api/containers/jobs/(?P<job_id>[^/]+)/logs$'), self.stream_job_logs),
+            (re.compile(r'^/api/dashboard/activities/stream$'), self.stream_activities),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            for pattern, handler in self.routes:
+                match = pattern.match(scope['path'])
+                if match:
+                    await handler(Request(scope, receive, send, match.groupdict()))
+                    return
+        await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        # Nothing to set up or tear down: Docker streams are opened per request.
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _authenticate(self, headers):
+        from auth.users import load_user
+
+        authorization = headers.get('authorization', '')
+        if not authorization.lower().startswith('bearer '):
+            return None
+        with self.flask_app.app_context():
+            try:
+                claims = decode_token(authorization[7:])
+            except Exception:
+                return None
+            if claims.get('type') != 'access' or load_user(claims['sub']) is None:
+                return None
+            return claims
+
+    async def authenticate(self, request):
+        # Token decoding is cheap, but the user lookup may touch the database.
+        claims = await asyncio.to_thread(self._authenticate, request.headers)
+        if claims is None:
+            await self.send_json(request, 401, {"msg": "Missing or invalid token"})
+        return claims
+
+    def cors_headers(self, request):
+        origin = request.headers.get('origin')
+        if origin and origin == self.allowed_origin:
+            return [(b'access-control-allow-origin', origin.encode('latin-1')), (b'vary', b'Origin')]
+        return []
+
+    async def send_json(self, request, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        await request.send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())]
+                + self.cors_headers(request),
+        })
+        await request.send({'type': 'http.response.body', 'body': payload})
+
+    async def send_stream(self, request, content_type, body):
+        """Send body (an async iterator of str) until it ends or the client leaves."""
+        await request.send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', content_type)] + SSE_HEADERS + self.cors_headers(request),
+        })
+
+        async def pump():
+            async for piece in body:
+                await request.send({'type': 'http.response.body', 'body': piece.encode('utf-8'), 'more_body': True})
+            await request.send({'type': 'http.response.body', 'body': b''})
+
+        async def wait_for_disconnect():
+            while (await request.receive())['type'] != 'http.disconnect':
+                pass
+
+        pump_task = asyncio.ensure_future(pump())
+        disconnect_task = asyncio.ensure_future(wait_for_disconnect())
+        try:
+            await asyncio.wait({pump_task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (pump_task, disconnect_task):
+                task.cancel()
+            await asyncio.gather(pump_task, disconnect_task, return_exceptions=True)
+            await body.aclose()
+        if pump_task.done() and not pump_task.cancelled() and pump_task.exception():
+            logger.warning(f"Stream {request.scope['path']} failed: {str(pump_task.exception())}")
+
+    async def with_keepalive(self, items):
+        """Interleave SSE keepalive comments into a quiet async iterator."""
+        queue = asyncio.Queue(maxsize=1)
+        done = object()
+        failure = []
+
+        async def produce():
+            try:
+                async for item in items:
+                    await queue.put(item)
+            except Exception as e:
+                failure.append(e)
+            # Only reached when the source ends on its own, so the consumer is
+            # still reading; a cancelled producer must not block on a full queue.
+            await queue.put(done)
+
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=self.keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if item is done:
+                    break
+                yield item
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+            await items.aclose()
+        if failure:
+            raise failure[0]
+
+    async def stream_container_logs(self, request):
+        from container.container.routes import parse_time_param, validate_container_id
+
+        if await self.authenticate(request) is None:
+            return
+        try:
+            container_id = validate_container_id(request.params['container_id'])
+            follow = request.args.get('follow', 'true').lower() != 'false'
+            output_format = request.args.get('format', 'sse')
+            if output_format not in ('sse', 'text'):
+                return await self.send_json(request, 400, {"message": "Invalid format, expected sse or text"})
+
+            since = parse_time_param(request.args.get('since'))
+            until = parse_time_param(request.args.get('until'))
+            tail = request.args.get('tail', '1000')
+            if tail != 'all' and not tail.isdigit():
+                return await self.send_json(request, 400, {"message": "Invalid tail value"})
+
+            cursor = request.headers.get('last-event-id') or request.args.get('cursor')
+            after = parse_cursor(cursor) if cursor else None
+            if after:
+                # Resume just before the cursor; lines up to it are skipped below.
+                since = after[0][0] + after[0][1] / 1e9 - 0.001
+                tail = 'all'
+        except ValueError as e:
+            return await self.send_json(request, 400, {"message": str(e)})
+
+        try:
+            details = await self.docker.inspect_container(container_id)
+        except AsyncDockerError as e:
+            if e.status == 404:
+                return await self.send_json(request, 404, {"message": "Container not found"})
+            return await self.send_json(request, 400, {"message": "Failed to retrieve logs"})
+        except OSError:
+            return await self.send_json(request, 400, {"message": "Failed to retrieve logs"})
+
+        chunks = self.docker.logs(
+            details['Id'],
+            follow=follow,
+            since=since,
+            until=until,
+            tail=tail,
+            tty=bool((details.get('Config') or {}).get('Tty'))
+        )
+
+        async def generate():
+            framer = LogLineFramer(self.max_line_bytes)
+            cursors = LogCursor(after)
+
+            def render(lines):
+                for timestamp, message in lines:
+                    labelled = cursors.label(timestamp, message)
+                    if labelled is None:
+                        continue
+                    line_cursor, line_timestamp, line = labelled
+                    if output_format == 'text':
+                        yield f"{line}\n"
+                    else:
+                        payload = json.dumps({"time": line_timestamp, "line": line})
+                        yield f"id: {line_cursor}\ndata: {payload}\n\n"
+
+            try:
+                async for chunk in chunks:
+                    for piece in render(framer.feed(chunk)):
+                        yield piece
+                for piece in render(framer.flush()):
+                    yield piece
+            finally:
+                await chunks.aclose()
+
+        body = generate()
+        if output_format == 'sse':
+            body = self.with_keepalive(body)
+        content_type = b'text/event-stream' if output_format == 'sse' else b'text/plain; charset=utf-8'
+        await self.send_stream(request, content_type, body)
+
+    async def stream_container_stats(self, request):
+        from container.container.routes import validate_container_id
+
+        if await self.authenticate(request) is None:
+            return
+        try:
+            container_id = validate_container_id(request.params['container_id'])
+            details = await self.docker.inspect_container(container_id)
+        except ValueError as e:
+            return await self.send_json(request, 400, {"message": str(e)})
+        except AsyncDockerError as e:
+            if e.status == 404:
+                return await self.send_json(request, 404, {"message": "Container not found"})
+            return await self.send_json(request, 400, {"message": "Failed to retrieve stats"})
+        except OSError:
+            return await self.send_json(request, 400, {"message": "Failed to retrieve stats"})
+
+        container_id = details['Id']
+        try:
+            # Subscribe before the response starts so a full hub can still be reported.
+            subscriber = self.stats_hub.subscribe(container_id)
+        except StatsCapacityError as e:
+            return await self.send_json(request, 503, {"message": str(e)})
+
+        async def generate():
+            while True:
+                sample = await subscriber.get()
+                if sample is None:
+                    yield "event: end\ndata: {}\n\n"
+                    break
+                yield f"data: {json.dumps(sample)}\n\n"
+
+        try:
+            await self.send_stream(request, b'text/event-stream', self.with_keepalive(generate()))
+        finally:
+            self.stats_hub.unsubscribe(container_id, subscriber)
+
+    async def stream_job_logs(self, request):
+        from container.container.routes import validate_job_id
+        from extensions import jobs
+
+        if await self.authenticate(request) is None:
+            return
+        try:
+            job_id = validate_job_id(request.params['job_id'])
+            after = int(request.headers.get('last-event-id') or request.args.get('after', 0))
+        except ValueError as e:
+            return await self.send_json(request, 400, {"message": str(e)})
+
+        job = jobs.get(job_id)
+        if job is None:
+            return await self.send_json(request, 404, {"message": "Job not found"})
+
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+
+        def on_change():
+            loop.call_soon_threadsafe(changed.set)
+
+        async def generate():
+            seq = after
+            while True:
+                changed.clear()
+                finished = job.finished
+                lines = job.logs_after(seq)
+                for seq, line in lines:
+                    yield f"id: {seq}\ndata: {json.dumps({'line': line})}\n\n"
+                if finished and not lines:
+                    yield f"event: end\ndata: {json.dumps(job.to_dict())}\n\n"
+                    break
+                if not lines:
+                    try:
+                        await asyncio.wait_for(changed.wait(), timeout=self.keepalive)
+                    except asyncio.TimeoutError:
+                        yield ": keepalive\n\n"
+
+        job.add_listener(on_change)
+        try:
+            await self.send_stream(request, b'text/event-stream', generate())
+        finally:
+            job.remove_listener(on_change)
+
+    async def stream_activities(self, request):
+        from dashboard.routes import format_event, parse_filter
+        from extensions import activity_feed
+        from services.activity_feed import event_matches
+
+        if await self.authenticate(request) is None:
+            return
+        if not activity_feed.ready:
+            return await self.send_json(request, 503, {'error': 'Activity feed is not available yet'})
+
+        types = parse_filter(request.args.get('type'))
+        actions = parse_filter(request.args.get('action'))
+        subscriber = activity_feed.subscribe(
+            LoopQueue(asyncio.get_running_loop(), activity_feed.subscriber_queue_size)
+        )
+
+        async def generate():
+            while True:
+                event = await subscriber.get()
+                if event_matches(event, types, actions):
+                    yield f"data: {json.dumps(format_event(event))}\n\n"
+
+        try:
+            await self.send_stream(request, b'text/event-stream', self.with_keepalive(generate()))
+        finally:
+            activity_feed.unsubscribe(subscriber)
+
+
+def create_asgi_app(flask_app=None):
+    if flask_app is None:
+        from app import create_app
+        flask_app = create_app()
+    return OrchestrixASGI(flask_app)
+
+
+def serve_asgi(flask_app, host, port):
+    try:
+        import uvicorn
+    except ImportError:
+        raise RuntimeError(f"ASGI mode requires the uvicorn package: {INSTALL_HINT}")
+    uvicorn.run(create_asgi_app(flask_app), host=host, port=port, lifespan='on')
@@ -0,0 +1,29 @@
+from flask import jsonify
+from flask_jwt_extended import current_user, get_jwt
+from werkzeug.security import check_password_hash
+
+from extensions import elevation
+
+
+def check_password(user, password):
+    if not password or len(password) > 100:
+        return False
+    return bool(user and check_password_hash(user.password, password))
+
+
+def require_elevation(data):
+    """Authorize a destructive request; returns an error response or None.
+
+    A request made with an elevated token passes straight through. Otherwise
+    the password in the request body is checked, and a correct one elevates
+    the token for the following calls.
+    """
+    jti = get_jwt().get('jti')
+    if elevation.is_elevated(jti, current_user.username):
+        return None
+
+    if not check_password(current_user, (data or {}).get('password')):
+        return jsonify({"message": "Invalid password"}), 403
+
+    elevation.grant(jti, current_user.username)
+    return None
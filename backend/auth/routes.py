@@ -1,7 +1,10 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt, current_user
 from werkzeug.security import check_password_hash, generate_password_hash
 from models import User, db
+from extensions import elevation, user_cache
+from auth.elevation import check_password
+from auth.users import load_user
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import re
@@ -33,7 +36,7 @@ def login():
         if not username or not password:
             return jsonify({"message": "Missing username or password"}), 400
 
-        user = User.query.filter_by(username=username).first()
+        user = load_user(username)
         if user and check_password_hash(user.password, password):
             access_token = create_access_token(identity=username)
             return jsonify(access_token=access_token), 200
@@ -54,18 +57,44 @@ def user():
 @auth_bp.route('/api/logout', methods=['POST'])
 @jwt_required()
 def logout():
+    elevation.revoke(get_jwt().get('jti'))
     return jsonify({"message": "Successfully logged out"}), 200
 
+@auth_bp.route('/api/elevate', methods=['POST'])
+@limiter.limit("5 per minute")
+@jwt_required()
+def elevate():
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"message": "Invalid request data"}), 400
+
+        if not check_password(current_user, data.get('password')):
+            return jsonify({"message": "Invalid password"}), 403
+
+        jti = get_jwt().get('jti')
+        expires_at = elevation.grant(jti, current_user.username)
+        return jsonify({"message": "Elevated", "expires_at": expires_at, "expires_in": elevation.ttl}), 200
+    except Exception as e:
+        return jsonify({"message": "Server error"}), 500
+
+@auth_bp.route('/api/elevate', methods=['GET'])
+@jwt_required()
+def elevation_status():
+    expires_at = elevation.expires_at(get_jwt().get('jti'))
+    return jsonify({"elevated": expires_at is not None, "expires_at": expires_at}), 200
+
+@auth_bp.route('/api/elevate', methods=['DELETE'])
+@jwt_required()
+def drop_elevation():
+    elevation.revoke(get_jwt().get('jti'))
+    return jsonify({"message": "Elevation dropped"}), 200
+
 @auth_bp.route('/api/profile', methods=['GET'])
 @jwt_required()
 def get_profile():
     try:
-        current_username = get_jwt_identity()
-        user = User.query.filter_by(username=current_username).first()
-        
-        if not user:
-            return jsonify({"message": "User not found"}), 404
-            
+        user = current_user
         user_data = {
             "username": user.username,
             "email": user.email,
@@ -80,8 +109,7 @@ def get_profile():
 @jwt_required()
 def update_profile():
     try:
-        current_username = get_jwt_identity()
-        user = User.query.filter_by(username=current_username).first()
+        user = db.session.get(User, current_user.id)
         
         if not user:
             return jsonify({"message": "User not found"}), 404
@@ -97,6 +125,7 @@ def update_profile():
             user.email = data['email']
             
         db.session.commit()
+        user_cache.invalidate(user.username)
         
         return jsonify({"message": "Profile updated successfully"}), 200
     except Exception as e:
@@ -107,24 +136,24 @@ def update_profile():
 @jwt_required()
 def change_password():
     try:
-        current_username = get_jwt_identity()
-        user = User.query.filter_by(username=current_username).first()
-        
-        if not user:
-            return jsonify({"message": "User not found"}), 404
-            
         data = request.get_json()
         if not data or 'current_password' not in data or 'new_password' not in data:
             return jsonify({"message": "Missing required fields"}), 400
             
-        if not check_password_hash(user.password, data['current_password']):
+        if not check_password_hash(current_user.password, data['current_password']):
             return jsonify({"message": "Current password is incorrect"}), 401
             
         if not validate_password(data['new_password']):
             return jsonify({"message": "Password must be at least 8 characters with numbers and letters"}), 400
             
+        user = db.session.get(User, current_user.id)
+        if not user:
+            return jsonify({"message": "User not found"}), 404
+
         user.password = generate_password_hash(data['new_password'])
         db.session.commit()
+        user_cache.invalidate(user.username)
+        elevation.revoke_user(user.username)
         
         return jsonify({"message": "Password changed successfully"}), 200
     except Exception as e:
@@ -0,0 +1,22 @@
+from collections import namedtuple
+
+from extensions import user_cache
+from models import User
+
+UserSnapshot = namedtuple('UserSnapshot', ['id', 'username', 'password', 'email', 'created_at'])
+
+
+def _query_user(username):
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        return None
+    return UserSnapshot(user.id, user.username, user.password, user.email, user.created_at)
+
+
+def load_user(username):
+    """Snapshot of a user by username, served from the user cache when fresh."""
+    return user_cache.get(username, _query_user)
+
+
+def lookup_jwt_user(_jwt_header, jwt_data):
+    return load_user(jwt_data['sub'])
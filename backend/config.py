@@ -15,4 +15,72 @@ class Config:
     DB_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database')
     os.makedirs(DB_FOLDER, exist_ok=True)
     SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(DB_FOLDER, "orchestrix.db")}'
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    WAITRESS_THREADS = int(os.getenv('WAITRESS_THREADS', 4))
+    SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+    ASGI_WSGI_WORKERS = int(os.getenv('ASGI_WSGI_WORKERS', WAITRESS_THREADS))
+
+    SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('SQLITE_POOL_SIZE', WAITRESS_THREADS)),
+        'max_overflow': int(os.getenv('SQLITE_MAX_OVERFLOW', 4)),
+        'pool_timeout': float(os.getenv('SQLITE_POOL_TIMEOUT', 10)),
+        'connect_args': {
+            'timeout': SQLITE_BUSY_TIMEOUT / 1000,
+            'check_same_thread': False,
+            'cached_statements': int(os.getenv('SQLITE_CACHED_STATEMENTS', 256)),
+        },
+    }
+
+    DOCKER_TIMEOUT = int(os.getenv('DOCKER_TIMEOUT', 30))
+    DOCKER_POOL_SIZE = int(os.getenv('DOCKER_POOL_SIZE', WAITRESS_THREADS))
+    DOCKER_HEALTH_INTERVAL = float(os.getenv('DOCKER_HEALTH_INTERVAL', 10))
+
+    INVENTORY_ENABLED = os.getenv('INVENTORY_ENABLED', 'true').lower() == 'true'
+    INVENTORY_RESYNC_DELAY = float(os.getenv('INVENTORY_RESYNC_DELAY', 5))
+    NETWORK_INSPECT_WORKERS = int(os.getenv('NETWORK_INSPECT_WORKERS', DOCKER_POOL_SIZE))
+
+    SYSTEM_SAMPLE_INTERVAL = float(os.getenv('SYSTEM_SAMPLE_INTERVAL', 5))
+    SYSTEM_SAMPLE_HISTORY = int(os.getenv('SYSTEM_SAMPLE_HISTORY', 120))
+    SYSTEM_SAMPLE_DISK_PATH = os.getenv('SYSTEM_SAMPLE_DISK_PATH', '/')
+
+    METRICS_RAW_CAPACITY = int(os.getenv('METRICS_RAW_CAPACITY', 720))
+    DASHBOARD_CHANGE_WINDOW = int(os.getenv('DASHBOARD_CHANGE_WINDOW', 3600))
+
+    ACTIVITY_BUFFER_SIZE = int(os.getenv('ACTIVITY_BUFFER_SIZE', 200))
+    ACTIVITY_BACKFILL_SECONDS = int(os.getenv('ACTIVITY_BACKFILL_SECONDS', 24 * 3600))
+    ACTIVITY_SUBSCRIBER_QUEUE_SIZE = int(os.getenv('ACTIVITY_SUBSCRIBER_QUEUE_SIZE', 100))
+    SSE_KEEPALIVE_SECONDS = float(os.getenv('SSE_KEEPALIVE_SECONDS', 15))
+
+    LOG_STREAM_MAX_LINE_BYTES = int(os.getenv('LOG_STREAM_MAX_LINE_BYTES', 64 * 1024))
+
+    STATS_MAX_STREAMS = int(os.getenv('STATS_MAX_STREAMS', 64))
+    STATS_VIEWER_RESERVED_STREAMS = int(os.getenv('STATS_VIEWER_RESERVED_STREAMS', 8))
+    STATS_IDLE_TIMEOUT = float(os.getenv('STATS_IDLE_TIMEOUT', 10))
+    STATS_SUBSCRIBER_QUEUE_SIZE = int(os.getenv('STATS_SUBSCRIBER_QUEUE_SIZE', 10))
+    STATS_FLEET_IDLE_TIMEOUT = float(os.getenv('STATS_FLEET_IDLE_TIMEOUT', 30))
+
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+    CREATE_JOB_WORKERS = int(os.getenv('CREATE_JOB_WORKERS', 4))
+    JOB_LOG_LINES = int(os.getenv('JOB_LOG_LINES', 1000))
+    JOB_RETENTION = int(os.getenv('JOB_RETENTION', 100))
+
+    BUILD_CACHE_MAX_ENTRIES = int(os.getenv('BUILD_CACHE_MAX_ENTRIES', 50))
+    BUILD_CACHE_GC_AGE = int(os.getenv('BUILD_CACHE_GC_AGE', 3600))
+
+    PULL_WORKERS = int(os.getenv('PULL_WORKERS', 4))
+    DEFAULT_PULL_POLICY = os.getenv('DEFAULT_PULL_POLICY', 'if-not-present')
+
+    BULK_WORKERS = int(os.getenv('BULK_WORKERS', 8))
+    BULK_TIMEOUT = float(os.getenv('BULK_TIMEOUT', 60))
+    BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', 500))
+
+    COMPOSE_WORKERS = int(os.getenv('COMPOSE_WORKERS', 4))
+
+    ELEVATION_TTL = int(os.getenv('ELEVATION_TTL', 300))
+
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 30))
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 256))
\ No newline at end of file
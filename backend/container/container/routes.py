@@ -1,61 +1,204 @@
-from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from werkzeug.security import check_password_hash
+from flask import Blueprint, request, jsonify, current_app, Response
+from flask_jwt_extended import jwt_required
 from flask_cors import cross_origin
-from werkzeug.utils import secure_filename
 
-from models import User
+from models import ComposeProject
+from auth.elevation import require_elevation
+from extensions import docker_manager, inventory, stats_hub, jobs, pull_manager
+from services.bulk import BULK_ACTIONS, run_bulk
+from services.compose import diff_project, parse_compose, project_containers
+from services.builds import find_zip_dockerfile, run_dockerfile_build, run_zip_build
+from services import build_cache, compose_projects
+from services.inventory import fetch_image_tags
+from services.log_stream import iter_cursored_lines, parse_cursor
+from services.pull_manager import PULL_POLICIES, run_pull_and_create
+from services.stats_hub import StatsCapacityError
 
 import docker
 import tempfile
 import os
-import uuid
-import shutil
 import zipfile
-import yaml
-import subprocess
+import json
+import base64
+import queue
 
 import re
+import threading
 from datetime import datetime
 import pytz
-from dateutil.parser import isoparse
 
 container_bp = Blueprint('container', __name__)
 
+# Serialises the active-deploy check with registering the next deploy job.
+compose_deploy_lock = threading.Lock()
+
 def validate_container_id(container_id):
     if not re.match("^[a-zA-Z0-9]+$", container_id):
         raise ValueError("Invalid container ID format")
     return container_id
 
 def get_docker_client():
+    return docker_manager.get_client()
+
+def format_ports(raw_ports):
+    ports = {}
+    for port in raw_ports or []:
+        key = f"{port.get('PrivatePort')}/{port.get('Type', 'tcp')}"
+        bindings = ports.get(key) or []
+        if port.get('PublicPort'):
+            bindings.append({
+                'HostIp': port.get('IP', ''),
+                'HostPort': str(port['PublicPort'])
+            })
+        ports[key] = bindings or None
+    return ports
+
+def format_container_summary(raw, image_tags, server_tz):
+    return {
+        'id': raw['Id'][:12],
+        'name': container_name(raw),
+        'status': raw.get('State', ''),
+        'image': image_tags.get(raw.get('ImageID'), "unknown"),
+        'created': datetime.fromtimestamp(raw['Created'], server_tz) \
+            .strftime('%H:%M:%S %d-%m-%Y'),
+        'ports': format_ports(raw.get('Ports')),
+    }
+
+def parse_label_selectors(labels):
+    if not isinstance(labels, list) or not all(isinstance(label, str) and label for label in labels):
+        raise ValueError("Invalid labels format")
+    return labels
+
+def labels_match(container_labels, selectors):
+    container_labels = container_labels or {}
+    for selector in selectors:
+        key, has_value, value = selector.partition('=')
+        if key not in container_labels or (has_value and container_labels[key] != value):
+            return False
+    return True
+
+CONTAINER_STATUSES = ('created', 'restarting', 'running', 'removing', 'paused', 'exited', 'dead')
+CONTAINER_FIELDS = ('id', 'name', 'status', 'image', 'created', 'ports')
+CONTAINER_SORT_KEYS = {
+    'name': lambda raw, image_tags: container_name(raw),
+    'created': lambda raw, image_tags: raw.get('Created', 0),
+    'status': lambda raw, image_tags: raw.get('State', ''),
+    'image': lambda raw, image_tags: image_tags.get(raw.get('ImageID'), "unknown"),
+}
+
+def container_name(raw):
+    names = raw.get('Names') or []
+    return names[0].lstrip('/') if names else ''
+
+def parse_list_param(name, allowed=None):
+    values = [value.strip() for item in request.args.getlist(name) for value in item.split(',') if value.strip()]
+    if allowed is not None:
+        invalid = [value for value in values if value not in allowed]
+        if invalid:
+            raise ValueError(f"Invalid {name}: {', '.join(invalid)}")
+    return values
+
+def encode_list_cursor(sort_value, container_id):
+    payload = json.dumps([sort_value, container_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+def decode_list_cursor(cursor):
     try:
-        return docker.from_env(timeout=30)
-    except docker.errors.DockerException as e:
-        raise RuntimeError(f"Failed to connect to Docker daemon: {str(e)}")
+        sort_value, container_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(container_id, str):
+        raise ValueError("Invalid cursor")
+    return sort_value, container_id
+
+def filter_containers(containers, image_tags, statuses, selectors, name, image):
+    return [
+        container for container in containers
+        if (not statuses or container.get('State') in statuses)
+        and (not selectors or labels_match(container.get('Labels'), selectors))
+        and (not name or name in container_name(container))
+        and (not image or image in image_tags.get(container.get('ImageID'), "unknown"))
+    ]
 
 @container_bp.route('/api/containers/list', methods=['GET'])
 @jwt_required()
 def list_containers():
     try:
-        client = get_docker_client()
-        containers = client.containers.list(all=True)
-        server_tz = pytz.timezone(datetime.now(pytz.timezone('UTC')).tzname())
+        statuses = parse_list_param('status', CONTAINER_STATUSES)
+        selectors = parse_label_selectors(request.args.getlist('label'))
+        name = request.args.get('name', '')
+        image = request.args.get('image', '')
+        fields = parse_list_param('fields', CONTAINER_FIELDS)
+
+        sort = request.args.get('sort', '-created')
+        descending = sort.startswith('-')
+        sort_field = sort.lstrip('-')
+        if sort_field not in CONTAINER_SORT_KEYS:
+            return jsonify({"message": f"Invalid sort. Use one of: {', '.join(CONTAINER_SORT_KEYS)}"}), 400
+
+        limit = request.args.get('limit', type=int)
+        if limit is not None and limit < 1:
+            return jsonify({"message": "limit must be positive"}), 400
+        cursor = request.args.get('cursor')
+        after = decode_list_cursor(cursor) if cursor else None
+        if after is not None and not isinstance(after[0], int if sort_field == 'created' else str):
+            return jsonify({"message": "Cursor does not match the sort order"}), 400
+
+        if inventory.ready:
+            containers = inventory.containers()
+            image_tags = inventory.image_tags()
+        else:
+            # Let the daemon do the filtering it supports; the rest is
+            # applied below either way.
+            filters = {}
+            if statuses:
+                filters['status'] = statuses
+            if selectors:
+                filters['label'] = selectors
+            if name and re.match(r"^[a-zA-Z0-9_.-]+$", name):
+                # The daemon treats this filter as a regular expression; a
+                # name outside the container name charset matches nothing
+                # below, so it is not worth sending.
+                filters['name'] = re.escape(name)
+            client = get_docker_client()
+            containers = client.api.containers(all=True, filters=filters)
+            image_tags = fetch_image_tags(client)
+
+        containers = filter_containers(containers, image_tags, statuses, selectors, name, image)
+        total = len(containers)
+
+        sort_key = CONTAINER_SORT_KEYS[sort_field]
+        keyed = sorted(
+            ((sort_key(container, image_tags), container['Id'], container) for container in containers),
+            key=lambda item: (item[0], item[1]),
+            reverse=descending
+        )
+        if after is not None:
+            keyed = [
+                item for item in keyed
+                if ((item[0], item[1]) < tuple(after) if descending else (item[0], item[1]) > tuple(after))
+            ]
 
-        container_list = []
-        for container in containers:
-            container_info = {
-                'id': container.short_id,
-                'name': container.name,
-                'status': container.status,
-                'image': container.image.tags[0] if container.image.tags else "unknown",
-                'created': isoparse(container.attrs['Created']) \
-                    .astimezone(server_tz) \
-                    .strftime('%H:%M:%S %d-%m-%Y'),
-                'ports': container.attrs['NetworkSettings']['Ports'],
-            }
-            container_list.append(container_info)
+        next_cursor = None
+        if limit is not None and len(keyed) > limit:
+            keyed = keyed[:limit]
+            next_cursor = encode_list_cursor(keyed[-1][0], keyed[-1][1])
 
-        return jsonify(container_list), 200
+        server_tz = pytz.timezone(datetime.now(pytz.timezone('UTC')).tzname())
+        container_list = []
+        for _, _, container in keyed:
+            summary = format_container_summary(container, image_tags, server_tz)
+            if fields:
+                summary = {field: summary[field] for field in fields}
+            container_list.append(summary)
+
+        response = jsonify(container_list)
+        response.headers['X-Total-Count'] = str(total)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         return jsonify({"message": "Failed to list containers"}), 400
 
@@ -160,20 +303,10 @@ def remove_container(container_id):
     try:
         validate_container_id(container_id)
         client = get_docker_client()
-        data = request.get_json()
-        if not data:
-            return jsonify({"message": "Invalid request data"}), 400
-            
-        username = get_jwt_identity()
-        password = data.get('password')
-        
-        if not password or len(password) > 100:
-            return jsonify({"message": "Invalid password"}), 403
-        
-        user = User.query.filter_by(username=username).first()
-        if not user or not check_password_hash(user.password, password):
-            return jsonify({"message": "Invalid password"}), 403
-        
+        denied = require_elevation(request.get_json(silent=True))
+        if denied:
+            return denied
+
         container = client.containers.get(container_id)
         if container.status == "running":
             return jsonify({"message": f"Container {container_id} is running, stop it before removing."}), 400
@@ -183,7 +316,74 @@ def remove_container(container_id):
         return jsonify({"message": str(e)}), 400
     except Exception as e:
         return jsonify({"message": "Operation failed"}), 400
-    
+
+def select_containers_by_labels(selectors):
+    if inventory.ready:
+        return [
+            container['Id'] for container in inventory.containers()
+            if labels_match(container.get('Labels'), selectors)
+        ]
+    containers = get_docker_client().api.containers(all=True, filters={'label': selectors})
+    return [container['Id'] for container in containers]
+
+@container_bp.route('/api/containers/bulk', methods=['POST'])
+@jwt_required()
+def bulk_container_action():
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"message": "Invalid request data"}), 400
+
+        action = data.get('action')
+        if action not in BULK_ACTIONS:
+            return jsonify({"message": f"Invalid action. Use one of: {', '.join(BULK_ACTIONS)}"}), 400
+
+        stop_timeout = data.get('timeout', 10)
+        if not isinstance(stop_timeout, int) or isinstance(stop_timeout, bool) or stop_timeout < 0:
+            return jsonify({"message": "Invalid timeout"}), 400
+
+        if action == 'remove':
+            denied = require_elevation(data)
+            if denied:
+                return denied
+
+        container_ids = data.get('ids')
+        if container_ids is not None:
+            if not isinstance(container_ids, list) or not all(isinstance(container_id, str) for container_id in container_ids):
+                return jsonify({"message": "Invalid ids format"}), 400
+            for container_id in container_ids:
+                validate_container_id(container_id)
+        elif data.get('labels') is not None:
+            container_ids = select_containers_by_labels(parse_label_selectors(data['labels']))
+        else:
+            return jsonify({"message": "Either ids or labels is required"}), 400
+
+        max_items = current_app.config['BULK_MAX_ITEMS']
+        if len(container_ids) > max_items:
+            return jsonify({"message": f"At most {max_items} containers can be targeted at once"}), 400
+
+        results = run_bulk(
+            docker_manager,
+            action,
+            list(dict.fromkeys(container_ids)),
+            stop_timeout,
+            current_app.config['BULK_WORKERS'],
+            current_app.config['BULK_TIMEOUT'] + stop_timeout
+        )
+        succeeded = sum(1 for result in results if result['status'] == 'succeeded')
+        failed = len(results) - succeeded
+
+        return jsonify({
+            "action": action,
+            "succeeded": succeeded,
+            "failed": failed,
+            "results": results
+        }), 207 if failed else 200
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"message": "Bulk operation failed"}), 400
+
 @container_bp.route('/api/containers/logs/<string:container_id>', methods=['GET'])
 @jwt_required()
 def get_container_logs(container_id):
@@ -198,11 +398,90 @@ def get_container_logs(container_id):
     except Exception as e:
         return jsonify({"message": "Failed to retrieve logs"}), 400
 
+def parse_time_param(value):
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+@container_bp.route('/api/containers/logs/<string:container_id>/stream', methods=['GET'])
+@jwt_required()
+def stream_container_logs(container_id):
+    try:
+        validate_container_id(container_id)
+        follow = request.args.get('follow', 'true').lower() != 'false'
+        output_format = request.args.get('format', 'sse')
+        if output_format not in ('sse', 'text'):
+            return jsonify({"message": "Invalid format, expected sse or text"}), 400
+
+        since = parse_time_param(request.args.get('since'))
+        until = parse_time_param(request.args.get('until'))
+        tail = request.args.get('tail', '1000')
+        if tail != 'all' and not tail.isdigit():
+            return jsonify({"message": "Invalid tail value"}), 400
+
+        cursor = request.headers.get('Last-Event-ID') or request.args.get('cursor')
+        after = parse_cursor(cursor) if cursor else None
+        if after:
+            # Resume just before the cursor; lines up to it are skipped below.
+            since = after[0][0] + after[0][1] / 1e9 - 0.001
+            tail = 'all'
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    try:
+        client = docker_manager.create_stream_client()
+    except Exception as e:
+        return jsonify({"message": "Failed to retrieve logs"}), 400
+
+    try:
+        chunks = client.api.logs(
+            container_id,
+            stream=True,
+            follow=follow,
+            timestamps=True,
+            since=since,
+            until=until,
+            tail=tail if tail == 'all' else int(tail)
+        )
+    except docker.errors.NotFound:
+        client.close()
+        return jsonify({"message": "Container not found"}), 404
+    except Exception as e:
+        client.close()
+        return jsonify({"message": "Failed to retrieve logs"}), 400
+
+    max_line_bytes = current_app.config['LOG_STREAM_MAX_LINE_BYTES']
+
+    def generate():
+        try:
+            for cursor, timestamp, line in iter_cursored_lines(chunks, after, max_line_bytes):
+                if output_format == 'text':
+                    yield f"{line}\n"
+                else:
+                    payload = json.dumps({"time": timestamp, "line": line})
+                    yield f"id: {cursor}\ndata: {payload}\n\n"
+        finally:
+            chunks.close()
+            client.close()
+
+    return Response(
+        generate(),
+        mimetype='text/event-stream' if output_format == 'sse' else 'text/plain',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @container_bp.route('/api/containers/inspect/<string:container_id>', methods=['GET'])
 @jwt_required()
 def inspect_container(container_id):
     try:
         validate_container_id(container_id)
+        if inventory.ready:
+            details = inventory.get_container_details(container_id)
+            if details is not None:
+                return jsonify(details), 200
         client = get_docker_client()
         container = client.containers.get(container_id)
         return jsonify(container.attrs), 200
@@ -229,6 +508,98 @@ def get_container_stats(container_id):
     except Exception as e:
         return jsonify({"message": "Failed to retrieve stats"}), 400
 
+STATS_SORT_FIELDS = {
+    'cpu': 'cpu_percent',
+    'memory': 'memory_percent',
+    'net': 'net_rx_rate',
+    'block': 'block_read_rate',
+}
+
+@container_bp.route('/api/containers/stats', methods=['GET'])
+@jwt_required()
+def get_fleet_stats():
+    try:
+        sort = request.args.get('sort')
+        if sort is not None and sort not in STATS_SORT_FIELDS:
+            return jsonify({"message": f"Invalid sort, expected one of: {', '.join(STATS_SORT_FIELDS)}"}), 400
+        top = request.args.get('top', type=int)
+        if top is not None and top < 1:
+            return jsonify({"message": "top must be a positive integer"}), 400
+
+        if inventory.ready:
+            running = [container for container in inventory.containers() if container.get('State') == 'running']
+        else:
+            running = get_docker_client().api.containers(filters={'status': 'running'})
+        names = {
+            container['Id']: (container.get('Names') or [''])[0].lstrip('/')
+            for container in running
+        }
+
+        untracked = stats_hub.track_fleet(list(names))
+        rows = stats_hub.fleet_snapshot(list(names), sort=STATS_SORT_FIELDS.get(sort), limit=top)
+        for row in rows:
+            row['id'] = row['container_id'][:12]
+            row['name'] = names.get(row['container_id'], '')
+
+        return jsonify({
+            "containers": rows,
+            "running": len(names),
+            "sampled": stats_hub.sampled_count(list(names)),
+            "untracked": len(untracked)
+        }), 200
+    except Exception as e:
+        return jsonify({"message": "Failed to retrieve stats"}), 400
+
+def resolve_container_id(container_id):
+    container = inventory.get_container(container_id) if inventory.ready else None
+    if container is not None:
+        return container['Id']
+    return get_docker_client().api.inspect_container(container_id)['Id']
+
+@container_bp.route('/api/containers/stats/<string:container_id>/stream', methods=['GET'])
+@jwt_required()
+def stream_container_stats(container_id):
+    try:
+        validate_container_id(container_id)
+        container_id = resolve_container_id(container_id)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except docker.errors.NotFound:
+        return jsonify({"message": "Container not found"}), 404
+    except Exception as e:
+        return jsonify({"message": "Failed to retrieve stats"}), 400
+
+    try:
+        # Subscribe before the response starts so a full hub can still be reported.
+        subscriber = stats_hub.subscribe(container_id)
+    except StatsCapacityError as e:
+        return jsonify({"message": str(e)}), 503
+
+    keepalive = current_app.config['SSE_KEEPALIVE_SECONDS']
+
+    def generate():
+        try:
+            while True:
+                try:
+                    sample = subscriber.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if sample is None:
+                    yield "event: end\ndata: {}\n\n"
+                    break
+                yield f"data: {json.dumps(sample)}\n\n"
+        finally:
+            stats_hub.unsubscribe(container_id, subscriber)
+
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # The generator's cleanup never runs if the body is never iterated.
+    response.call_on_close(lambda: stats_hub.unsubscribe(container_id, subscriber))
+    return response
+
 @container_bp.route('/api/containers/create', methods=['POST'])
 @jwt_required()
 def create_container():
@@ -254,21 +625,30 @@ def create_container():
         if not isinstance(environment, dict):
             return jsonify({"message": "Invalid environment format"}), 400
         
-        try:
-            client.images.pull(image_name)
-        except docker.errors.ImageNotFound:
-            return jsonify({"message": f"Image {image_name} not found"}), 404
-        except docker.errors.APIError as e:
-            return jsonify({"message": f"Error pulling image: {str(e)}"}), 400
-        
-        container = client.containers.create(
-            image=image_name,
-            name=container_name,
-            ports=ports,
-            environment=environment,
-            detach=True
-        )
-        
+        pull_policy = data.get('pull_policy', pull_manager.default_policy)
+        if pull_policy not in PULL_POLICIES:
+            return jsonify({"message": f"Invalid pull policy. Use one of: {', '.join(PULL_POLICIES)}"}), 400
+
+        create_kwargs = {
+            "name": container_name,
+            "ports": ports,
+            "environment": environment,
+            "detach": True
+        }
+
+        image_present = pull_policy != 'always' and pull_manager.image_present(image_name)
+        if not image_present:
+            if pull_policy == 'never':
+                return jsonify({"message": f"Image {image_name} not present locally"}), 404
+
+            job = jobs.submit('create', run_pull_and_create, pull_manager, docker_manager, image_name, create_kwargs)
+            return jsonify({
+                "message": "Image pull queued",
+                "job_id": job.id
+            }), 202
+
+        container = client.containers.create(image=image_name, **create_kwargs)
+
         return jsonify({
             "message": "Container created successfully",
             "container_id": container.id
@@ -276,6 +656,25 @@ def create_container():
     except Exception as e:
         return jsonify({"message": "Container creation failed"}), 400
 
+def create_from_cached_build(digest, name):
+    client = get_docker_client()
+    image_id = build_cache.lookup(client, digest)
+    if image_id is None:
+        return None
+
+    container = client.containers.create(
+        image=image_id,
+        name=name,
+        detach=True
+    )
+
+    return jsonify({
+        "message": "Container created from cached build",
+        "container_id": container.id,
+        "image_id": image_id,
+        "cached": True
+    }), 201
+
 @container_bp.route('/api/containers/build/dockerfile', methods=['POST'])
 @jwt_required()
 def build_from_dockerfile():
@@ -291,40 +690,18 @@ def build_from_dockerfile():
         return jsonify({"message": "Invalid container name format"}), 400
 
     try:
-        client = get_docker_client()
-        
-        build_dir = os.path.join(tempfile.gettempdir(), f"docker_build_{uuid.uuid4().hex}")
-        os.makedirs(build_dir, exist_ok=True)
-        
-        try:
-            dockerfile_path = os.path.join(build_dir, "Dockerfile")
-            file.save(dockerfile_path)
-            
-            image_tag = f"local-build-{uuid.uuid4().hex[:8]}"
-            image, logs = client.images.build(
-                path=build_dir,
-                tag=image_tag,
-                rm=True
-            )
-            
-            container = client.containers.create(
-                image=image_tag,
-                name=name,
-                detach=True
-            )
-            
-            return jsonify({
-                "message": "Container built successfully",
-                "container_id": container.id,
-                "image_id": image.id
-            }), 201
-            
-        finally:
-            if os.path.exists(build_dir):
-                shutil.rmtree(build_dir)
-                
-    except docker.errors.BuildError as e:
-        return jsonify({"message": f"Build error: {str(e)}"}), 400
+        dockerfile = file.read()
+        digest = build_cache.hash_bytes('dockerfile', dockerfile)
+        cached = create_from_cached_build(digest, name)
+        if cached is not None:
+            return cached
+
+        job = jobs.submit('build', run_dockerfile_build, docker_manager, dockerfile, name, digest)
+
+        return jsonify({
+            "message": "Container build queued",
+            "job_id": job.id
+        }), 202
     except docker.errors.APIError as e:
         return jsonify({"message": f"Docker API error: {str(e)}"}), 400
     except Exception as e:
@@ -348,65 +725,165 @@ def build_from_zip():
     if name and not re.match("^[a-zA-Z0-9][a-zA-Z0-9_.-]+$", name):
         return jsonify({"message": "Invalid container name format"}), 400
 
+    fd, zip_path = tempfile.mkstemp(prefix="docker_build_", suffix=".zip")
+    os.close(fd)
+    queued = False
+
     try:
-        client = get_docker_client()
-        
-        build_dir = os.path.join(tempfile.gettempdir(), f"docker_build_{uuid.uuid4().hex}")
-        os.makedirs(build_dir, exist_ok=True)
-        
-        try:
-            zip_path = os.path.join(build_dir, "source.zip")
-            file.save(zip_path)
-            
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(build_dir)
-            
-            dockerfile_path = None
-            for root, _, files in os.walk(build_dir):
-                for filename in files:
-                    if filename.lower() == "dockerfile":
-                        dockerfile_path = os.path.join(root, filename)
-                        break
-                if dockerfile_path:
-                    break
-            
-            if not dockerfile_path:
+        digest = build_cache.save_and_hash('zip', file.stream, zip_path)
+
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            if find_zip_dockerfile(zip_ref.namelist()) is None:
                 return jsonify({"message": "No Dockerfile found in the ZIP archive"}), 400
-            
-            dockerfile_dir = os.path.dirname(dockerfile_path)
-            
-            image_tag = f"local-build-{uuid.uuid4().hex[:8]}"
-            image, logs = client.images.build(
-                path=dockerfile_dir,
-                tag=image_tag,
-                rm=True
-            )
-            
-            container = client.containers.create(
-                image=image_tag,
-                name=name,
-                detach=True
-            )
-            
-            return jsonify({
-                "message": "Container built successfully from ZIP",
-                "container_id": container.id,
-                "image_id": image.id
-            }), 201
-            
-        finally:
-            if os.path.exists(build_dir):
-                shutil.rmtree(build_dir)
-                
+
+        cached = create_from_cached_build(digest, name)
+        if cached is not None:
+            return cached
+
+        # The job owns the archive from here on and removes it when done.
+        job = jobs.submit('build', run_zip_build, docker_manager, zip_path, name, digest)
+        queued = True
+
+        return jsonify({
+            "message": "Container build from ZIP queued",
+            "job_id": job.id
+        }), 202
+
     except zipfile.BadZipFile:
         return jsonify({"message": "Invalid ZIP file"}), 400
-    except docker.errors.BuildError as e:
-        return jsonify({"message": f"Build error: {str(e)}"}), 400
     except docker.errors.APIError as e:
         return jsonify({"message": f"Docker API error: {str(e)}"}), 400
     except Exception as e:
         current_app.logger.error(f"Error in build_from_zip: {str(e)}")
         return jsonify({"message": "Failed to build container from ZIP"}), 500
+    finally:
+        if not queued and os.path.exists(zip_path):
+            os.remove(zip_path)
+
+def validate_job_id(job_id):
+    if not re.match("^[a-f0-9]{32}$", job_id):
+        raise ValueError("Invalid job ID format")
+    return job_id
+
+@container_bp.route('/api/containers/pulls', methods=['GET'])
+@jwt_required()
+def list_pulls():
+    return jsonify([operation.to_dict() for operation in pull_manager.inflight()]), 200
+
+@container_bp.route('/api/containers/jobs', methods=['GET'])
+@jwt_required()
+def list_jobs():
+    return jsonify([job.to_dict() for job in jobs.list()]), 200
+
+@container_bp.route('/api/containers/jobs/<string:job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    try:
+        validate_job_id(job_id)
+        job = jobs.get(job_id)
+        if job is None:
+            return jsonify({"message": "Job not found"}), 404
+        return jsonify(job.to_dict()), 200
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+@container_bp.route('/api/containers/jobs/<string:job_id>/cancel', methods=['POST'])
+@jwt_required()
+def cancel_job(job_id):
+    try:
+        validate_job_id(job_id)
+        job = jobs.cancel(job_id)
+        if job is None:
+            return jsonify({"message": "Job not found"}), 404
+        if job.finished and job.status != 'cancelled':
+            return jsonify({"message": f"Job already {job.status}"}), 409
+        return jsonify({"message": "Job cancellation requested", "status": job.status}), 202
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+@container_bp.route('/api/containers/jobs/<string:job_id>/logs', methods=['GET'])
+@jwt_required()
+def stream_job_logs(job_id):
+    try:
+        validate_job_id(job_id)
+        after = int(request.headers.get('Last-Event-ID') or request.args.get('after', 0))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"message": "Job not found"}), 404
+
+    keepalive = current_app.config['SSE_KEEPALIVE_SECONDS']
+
+    def generate():
+        seq = after
+        while True:
+            finished = job.finished
+            lines = job.logs_after(seq, timeout=keepalive)
+            for seq, line in lines:
+                yield f"id: {seq}\ndata: {json.dumps({'line': line})}\n\n"
+            if finished and not lines:
+                yield f"event: end\ndata: {json.dumps(job.to_dict())}\n\n"
+                break
+            if not lines:
+                yield ": keepalive\n\n"
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def compose_deploy_active(project):
+    job = jobs.get(project.last_job_id) if project.last_job_id else None
+    return job is not None and not job.finished
+
+def plan_orphan_removal(plan, remove_orphans, data):
+    """Orphaned services of a plan, and those the request may remove.
+
+    Removing orphans force-removes containers, so it is opt-in and needs
+    elevation like any other destructive operation. Returns the orphans, the
+    approved removals and an error response (or None).
+    """
+    orphans = diff_project(plan, project_containers(get_docker_client(), plan['project']))[1]
+    if not remove_orphans or not orphans:
+        return orphans, [], None
+    error = require_elevation(data)
+    if error:
+        return orphans, [], error
+    current_app.logger.info(f"Compose project {plan['project']}: removing orphaned services {', '.join(orphans)}")
+    return orphans, orphans, None
+
+def queue_compose_deploy(name, remove_orphans=(), plan=None, compose_file=None):
+    """Queue a deploy of a project, storing a new compose file first if given.
+
+    Returns None when the project is already being deployed. The check and
+    the job registration happen under one lock, so two concurrent requests
+    cannot both queue a deploy of the same project.
+    """
+    with compose_deploy_lock:
+        # Re-read: another request may have queued a deploy since we looked.
+        project = ComposeProject.query.filter_by(name=name).populate_existing().first()
+        if project is not None and compose_deploy_active(project):
+            return None
+        if plan is not None:
+            project = compose_projects.save_project(plan, compose_file)
+
+        job = jobs.create('compose')
+        try:
+            compose_projects.mark_queued(project, job.id)
+        except Exception as e:
+            job.set_status('failed', error=str(e))
+            raise
+    return jobs.start(
+        job,
+        compose_projects.run_project_deploy,
+        docker_manager,
+        pull_manager,
+        project.name,
+        current_app.config['COMPOSE_WORKERS'],
+        list(remove_orphans)
+    )
 
 @container_bp.route('/api/containers/build/compose', methods=['POST'])
 @jwt_required()
@@ -422,42 +899,107 @@ def build_from_compose():
         return jsonify({"message": "File must be a YAML file (.yml or .yaml)"}), 400
 
     try:
-        client = get_docker_client()
-        
-        build_dir = os.path.join(tempfile.gettempdir(), f"docker_compose_{uuid.uuid4().hex}")
-        os.makedirs(build_dir, exist_ok=True)
-        
-        try:
-            compose_path = os.path.join(build_dir, "docker-compose.yml")
-            file.save(compose_path)
-            
-            result = subprocess.run(
-                ['docker-compose', '-f', compose_path, 'up', '-d'],
-                cwd=build_dir,
-                capture_output=True,
-                text=True,
-                timeout=300
-            )
-            
-            if result.returncode != 0:
-                return jsonify({
-                    "message": f"Docker Compose failed: {result.stderr}"
-                }), 400
-            
-            return jsonify({
-                "message": "Containers created successfully from compose file",
-                "output": result.stdout
-            }), 201
-            
-        finally:
-            if os.path.exists(build_dir):
-                shutil.rmtree(build_dir)
-                
-    except subprocess.TimeoutExpired:
-        return jsonify({"message": "Docker Compose operation timed out"}), 408
-    except FileNotFoundError:
-        return jsonify({"message": "docker-compose command not found. Please ensure Docker Compose is installed."}), 500
+        text = file.read().decode('utf-8')
+        plan = parse_compose(text, request.form.get('project'))
+
+        project = ComposeProject.query.filter_by(name=plan['project']).first()
+        if project is not None and compose_deploy_active(project):
+            return jsonify({"message": f"Project {project.name} is already being deployed"}), 409
+
+        remove_orphans = request.form.get('remove_orphans', 'false').lower() == 'true'
+        orphans, removals, error = plan_orphan_removal(plan, remove_orphans, request.form)
+        if error:
+            return error
+
+        job = queue_compose_deploy(plan['project'], removals, plan, text)
+        if job is None:
+            return jsonify({"message": f"Project {plan['project']} is already being deployed"}), 409
+
+        return jsonify({
+            "message": "Compose deployment queued",
+            "project": plan['project'],
+            "job_id": job.id,
+            "orphans": orphans,
+            "remove_orphans": removals
+        }), 202
+    except UnicodeDecodeError:
+        return jsonify({"message": "Compose file must be UTF-8 encoded"}), 400
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Error in build_from_compose: {str(e)}")
         return jsonify({"message": "Failed to create containers from compose file"}), 500
 
+def validate_project_name(name):
+    if not re.match("^[a-z0-9][a-z0-9_-]*$", name):
+        raise ValueError("Invalid project name format")
+    return name
+
+def get_compose_project(name):
+    validate_project_name(name)
+    return ComposeProject.query.filter_by(name=name).first()
+
+@container_bp.route('/api/containers/compose/projects', methods=['GET'])
+@jwt_required()
+def list_compose_projects():
+    try:
+        projects = ComposeProject.query.order_by(ComposeProject.name).all()
+        return jsonify([compose_projects.project_to_dict(project) for project in projects]), 200
+    except Exception as e:
+        return jsonify({"message": "Failed to list compose projects"}), 400
+
+@container_bp.route('/api/containers/compose/projects/<string:name>', methods=['GET'])
+@jwt_required()
+def get_compose_project_details(name):
+    try:
+        project = get_compose_project(name)
+        if project is None:
+            return jsonify({"message": "Compose project not found"}), 404
+
+        existing = project_containers(get_docker_client(), project.name)
+        changes, orphans = diff_project(project.plan, existing)
+
+        return jsonify({
+            **compose_projects.project_to_dict(project),
+            "changes": changes,
+            "orphans": orphans,
+            "containers": {
+                service: {"id": container['Id'][:12], "status": container.get('State', '')}
+                for service, container in existing.items()
+            }
+        }), 200
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"message": "Failed to inspect compose project"}), 400
+
+@container_bp.route('/api/containers/compose/projects/<string:name>/redeploy', methods=['POST'])
+@jwt_required()
+def redeploy_compose_project(name):
+    try:
+        project = get_compose_project(name)
+        if project is None:
+            return jsonify({"message": "Compose project not found"}), 404
+        if compose_deploy_active(project):
+            return jsonify({"message": f"Project {project.name} is already being deployed"}), 409
+
+        data = request.get_json(silent=True) or {}
+        orphans, removals, error = plan_orphan_removal(project.plan, bool(data.get('remove_orphans')), data)
+        if error:
+            return error
+
+        job = queue_compose_deploy(project.name, removals)
+        if job is None:
+            return jsonify({"message": f"Project {project.name} is already being deployed"}), 409
+        return jsonify({
+            "message": "Compose redeploy queued",
+            "project": project.name,
+            "job_id": job.id,
+            "orphans": orphans,
+            "remove_orphans": removals
+        }), 202
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"message": "Failed to redeploy compose project"}), 400
+
@@ -1,11 +1,12 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from werkzeug.security import check_password_hash
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
 from flask_cors import cross_origin
 
 import docker
 import re
-from models import User
+from auth.elevation import require_elevation
+from extensions import docker_manager, inventory
+from services.inventory import inspect_networks
 from datetime import datetime
 import pytz
 from dateutil.parser import isoparse
@@ -13,10 +14,7 @@ from dateutil.parser import isoparse
 network_bp = Blueprint('network', __name__)
 
 def get_docker_client():
-    try:
-        return docker.from_env(timeout=30)
-    except docker.errors.DockerException as e:
-        raise RuntimeError(f"Failed to connect to Docker daemon: {str(e)}")
+    return docker_manager.get_client()
 
 def validate_network_id(network_id):
     if not re.match("^[a-zA-Z0-9]+$", network_id):
@@ -27,26 +25,23 @@ def validate_network_id(network_id):
 @jwt_required()
 def list_networks():
     try:
-        client = get_docker_client()
-        networks = client.networks.list()
-        
+        if inventory.ready:
+            networks = inventory.networks()
+        else:
+            client = get_docker_client()
+            networks = inspect_networks(client, min(current_app.config['NETWORK_INSPECT_WORKERS'], docker_manager.pool_size))
+
         networks_list = []
-        for network in networks:
-            network_data = client.api.inspect_network(network.id)
-            
-            connected_containers = 0
-            if "Containers" in network_data:
-                connected_containers = len(network_data["Containers"])
-            
+        for network_data in networks:
             network_info = {
-                'id': network.short_id,
-                'name': network.name,
-                'driver': network.attrs['Driver'],
-                'scope': network.attrs['Scope'],
-                'created': isoparse(network.attrs['Created']) \
+                'id': network_data['Id'][:12],
+                'name': network_data['Name'],
+                'driver': network_data['Driver'],
+                'scope': network_data['Scope'],
+                'created': isoparse(network_data['Created']) \
                 .astimezone(pytz.UTC) \
                 .strftime('%H:%M:%S %d-%m-%Y'),
-                'containers': connected_containers
+                'containers': len(network_data.get('Containers') or {})
             }
             networks_list.append(network_info)
 
@@ -96,21 +91,11 @@ def remove_network(network_id):
     try:
         validate_network_id(network_id)
         client = get_docker_client()
-        
-        data = request.get_json()
-        if not data:
-            return jsonify({"message": "Invalid request data"}), 400
-            
-        username = get_jwt_identity()
-        password = data.get('password')
-        
-        if not password or len(password) > 100:
-            return jsonify({"message": "Invalid password"}), 403
-        
-        user = User.query.filter_by(username=username).first()
-        if not user or not check_password_hash(user.password, password):
-            return jsonify({"message": "Invalid password"}), 403
-            
+
+        denied = require_elevation(request.get_json(silent=True))
+        if denied:
+            return denied
+
         network = client.networks.get(network_id)
         
         # Prevent removal of default networks
@@ -201,20 +186,27 @@ def disconnect_container():
 def get_network_containers(network_id):
     try:
         validate_network_id(network_id)
-        client = get_docker_client()
-        
-        network = client.networks.get(network_id)
-        network_data = client.api.inspect_network(network.id)
-        
+        network_data = inventory.get_network(network_id) if inventory.ready else None
+
+        if network_data is not None:
+            attached = [inventory.get_container(container_id) for container_id in network_data.get("Containers") or {}]
+        else:
+            client = get_docker_client()
+            network_data = client.api.inspect_network(network_id)
+            attached = client.api.containers(all=True, filters={'network': network_data['Id']}) \
+                if network_data.get("Containers") else []
+
         containers_list = []
-        if "Containers" in network_data and network_data["Containers"]:
-            for container_id, container_info in network_data["Containers"].items():
-                container = client.containers.get(container_id)
-                containers_list.append({
-                    'id': container.short_id,
-                    'name': container.name,
-                    'status': container.status,
-                })
+        attached_ids = network_data.get("Containers") or {}
+        for container in attached:
+            if not container or container['Id'] not in attached_ids:
+                continue
+            names = container.get('Names') or []
+            containers_list.append({
+                'id': container['Id'][:12],
+                'name': names[0].lstrip('/') if names else '',
+                'status': container.get('State', ''),
+            })
             
         return jsonify(containers_list), 200
         
@@ -230,8 +222,12 @@ def get_network_containers(network_id):
 def inspect_network(network_id):
     try:
         validate_network_id(network_id)
-        client = get_docker_client()
+        if inventory.ready:
+            network_data = inventory.get_network(network_id)
+            if network_data is not None:
+                return jsonify(network_data), 200
 
+        client = get_docker_client()
         network = client.networks.get(network_id)
         network_data = client.api.inspect_network(network.id)
 
@@ -1,9 +1,9 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from werkzeug.security import check_password_hash
+from flask_jwt_extended import jwt_required
 
 import docker
-from models import User
+from auth.elevation import require_elevation
+from extensions import docker_manager, inventory
 import pytz
 from dateutil.parser import isoparse
 import re
@@ -11,58 +11,74 @@ import re
 volume_bp = Blueprint('volume', __name__)
 
 def get_docker_client():
-    try:
-        return docker.from_env(timeout=30)
-    except docker.errors.DockerException as e:
-        raise RuntimeError(f"Failed to connect to Docker daemon: {str(e)}")
+    return docker_manager.get_client()
 
 def validate_volume_name(volume_name):
     if not re.match(r"^[a-zA-Z0-9][a-zA-Z0-9_.-]+$", volume_name):
         raise ValueError("Invalid volume name format")
     return volume_name
 
+def format_volume_usage(container, mount):
+    names = container.get('Names') or []
+    return {
+        'id': container['Id'][:12],
+        'name': names[0].lstrip('/') if names else '',
+        'status': container.get('State', ''),
+        'mountpoint': mount.get('Destination'),
+        'container_id': container['Id']
+    }
+
 def get_volume_usage_map(client):
     volume_usage = {}
-    containers = client.containers.list(all=True)
+    containers = client.api.containers(all=True)
 
     for container in containers:
-        mounts = container.attrs.get('Mounts', [])
+        mounts = container.get('Mounts') or []
         for mount in mounts:
             if mount.get('Type') == 'volume':
                 volume_name = mount.get('Name')
                 if not volume_name:
                     continue
-                volume_usage.setdefault(volume_name, []).append({
-                    'id': container.short_id,
-                    'name': container.name,
-                    'status': container.status,
-                    'mountpoint': mount.get('Destination'),
-                    'container_id': container.id
-                })
+                volume_usage.setdefault(volume_name, []).append(format_volume_usage(container, mount))
     return volume_usage
 
+def get_volume_usage(volume_name):
+    if inventory.ready:
+        return [
+            format_volume_usage(container, mount)
+            for container, mount in inventory.volume_mounts(volume_name)
+        ]
+    return get_volume_usage_map(get_docker_client()).get(volume_name, [])
+
 @volume_bp.route('/api/volumes/list', methods=['GET'])
 @jwt_required()
 def list_volumes():
     try:
-        client = get_docker_client()
-        volumes = client.volumes.list()
-        usage_map = get_volume_usage_map(client)
+        if inventory.ready:
+            volumes = inventory.volumes()
+            usage_counts = inventory.volume_usage_counts()
+        else:
+            client = get_docker_client()
+            volumes = client.api.volumes().get('Volumes') or []
+            usage_counts = {
+                volume_name: len(usage)
+                for volume_name, usage in get_volume_usage_map(client).items()
+            }
 
         volumes_list = []
         for volume in volumes:
-            usage_data = volume.attrs.get('UsageData') or {}
+            usage_data = volume.get('UsageData') or {}
             volume_info = {
-                'id': volume.short_id,
-                'name': volume.name,
-                'driver': volume.attrs.get('Driver'),
-                'scope': volume.attrs.get('Scope'),
-                'mountpoint': volume.attrs.get('Mountpoint'),
-                'created': isoparse(volume.attrs['CreatedAt']) \
+                'id': volume['Name'][:12],
+                'name': volume['Name'],
+                'driver': volume.get('Driver'),
+                'scope': volume.get('Scope'),
+                'mountpoint': volume.get('Mountpoint'),
+                'created': isoparse(volume['CreatedAt']) \
                     .astimezone(pytz.UTC) \
                     .strftime('%H:%M:%S %d-%m-%Y'),
                 'size': usage_data.get('Size'),
-                'containers': len(usage_map.get(volume.name, []))
+                'containers': usage_counts.get(volume['Name'], 0)
             }
             volumes_list.append(volume_info)
 
@@ -120,25 +136,17 @@ def remove_volume(volume_name):
         validate_volume_name(volume_name)
         client = get_docker_client()
 
-        data = request.get_json()
-        if not data:
-            return jsonify({"message": "Invalid request data"}), 400
-
-        username = get_jwt_identity()
-        password = data.get('password')
+        data = request.get_json(silent=True) or {}
         force = bool(data.get('force', False))
 
-        if not password or len(password) > 100:
-            return jsonify({"message": "Invalid password"}), 403
-
-        user = User.query.filter_by(username=username).first()
-        if not user or not check_password_hash(user.password, password):
-            return jsonify({"message": "Invalid password"}), 403
+        denied = require_elevation(data)
+        if denied:
+            return denied
 
         volume = client.volumes.get(volume_name)
 
         if not force:
-            usage = get_volume_usage_map(client).get(volume.name, [])
+            usage = get_volume_usage(volume.name)
             if usage:
                 return jsonify({
                     "message": f"Volume {volume_name} is attached to containers. Detach it or use force to remove."
@@ -162,8 +170,12 @@ def remove_volume(volume_name):
 def inspect_volume(volume_name):
     try:
         validate_volume_name(volume_name)
-        client = get_docker_client()
+        if inventory.ready:
+            volume_data = inventory.get_volume(volume_name)
+            if volume_data is not None:
+                return jsonify(volume_data), 200
 
+        client = get_docker_client()
         volume = client.volumes.get(volume_name)
         volume_data = client.api.inspect_volume(volume.name)
 
@@ -183,9 +195,7 @@ def inspect_volume(volume_name):
 def get_volume_containers(volume_name):
     try:
         validate_volume_name(volume_name)
-        client = get_docker_client()
-
-        containers = get_volume_usage_map(client).get(volume_name, [])
+        containers = get_volume_usage(volume_name)
         return jsonify(containers), 200
 
     except ValueError as e:
@@ -1,45 +1,42 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request, current_app, Response
 from flask_jwt_extended import jwt_required
-import docker
+from extensions import docker_manager, inventory, system_sampler, metrics, activity_feed
+from services.activity_feed import event_matches
+from collections import deque
 from datetime import datetime, timedelta
-import psutil
-import os
 import json
+import queue
 
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
-docker_client = docker.from_env()
-
-STATS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'prev_stats.json')
 
 @dashboard_bp.route('/stats', methods=['GET'])
 @jwt_required()
 def get_dashboard_stats():
     try:
-        containers = docker_client.containers.list(all=True)
-        container_count = len(containers)
-        
-        networks = docker_client.networks.list()
-        network_count = len(networks)
-        
-        volumes = docker_client.volumes.list()
-        volume_count = len(volumes)
-        
-        system_load = calculate_system_load()
-        
-        prev_stats = load_previous_stats()
+        smooth = request.args.get('smooth', type=int)
+        if smooth is not None and smooth < 1:
+            return jsonify({'error': 'smooth must be at least 1'}), 400
+        window = request.args.get('window', default=current_app.config['DASHBOARD_CHANGE_WINDOW'], type=int)
+        if inventory.ready:
+            counts = inventory.counts()
+            container_count = counts['container_count']
+            network_count = counts['network_count']
+            volume_count = counts['volume_count']
+        else:
+            docker_client = docker_manager.get_client()
+            container_count = len(docker_client.api.containers(all=True))
+            network_count = len(docker_client.api.networks())
+            volume_count = len(docker_client.api.volumes().get('Volumes') or [])
         
-        container_change = calculate_change(prev_stats.get('container_count', container_count), container_count)
-        network_change = calculate_change(prev_stats.get('network_count', network_count), network_count)
-        volume_change = calculate_change(prev_stats.get('volume_count', volume_count), volume_count)
-        load_change = calculate_change(prev_stats.get('system_load', system_load), system_load)
+        sample = system_sampler.latest()
+        if sample is None:
+            return jsonify({'error': 'System metrics are not available yet'}), 503
+        system_load = sample['system_load']
         
-        save_current_stats({
-            'container_count': container_count,
-            'network_count': network_count,
-            'volume_count': volume_count,
-            'system_load': system_load,
-            'timestamp': datetime.now().isoformat()
-        })
+        container_change = calculate_window_change('container_count', container_count, window)
+        network_change = calculate_window_change('network_count', network_count, window)
+        volume_change = calculate_window_change('volume_count', volume_count, window)
+        load_change = calculate_window_change('system_load', system_load, window)
         
         return jsonify({
             'container_count': container_count,
@@ -49,7 +46,40 @@ def get_dashboard_stats():
             'container_change': container_change,
             'network_change': network_change,
             'volume_change': volume_change,
-            'load_change': load_change
+            'load_change': load_change,
+            'system': sample,
+            'system_average': system_sampler.average(smooth) if smooth else None
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@dashboard_bp.route('/history', methods=['GET'])
+@jwt_required()
+def get_dashboard_history():
+    try:
+        resolution = request.args.get('resolution', '1m')
+        if resolution not in metrics.resolutions():
+            return jsonify({'error': f"Invalid resolution, expected one of: {', '.join(metrics.resolutions())}"}), 400
+
+        points = request.args.get('points', default=60, type=int)
+        if points < 1 or points > 1440:
+            return jsonify({'error': 'points must be between 1 and 1440'}), 400
+
+        names = request.args.get('metric')
+        names = names.split(',') if names else metrics.metrics()
+        unknown = [name for name in names if name not in metrics.metrics()]
+        if unknown:
+            return jsonify({'error': f"Unknown metric: {', '.join(unknown)}"}), 400
+
+        return jsonify({
+            'resolution': resolution,
+            'metrics': {
+                name: [
+                    {'time': datetime.fromtimestamp(timestamp).isoformat(), 'value': round(value, 2)}
+                    for timestamp, value in metrics.points(name, resolution, count=points)
+                ]
+                for name in names
+            }
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -58,56 +88,77 @@ def get_dashboard_stats():
 @jwt_required()
 def get_recent_activities():
     try:
-        since = datetime.now() - timedelta(hours=24)
-        until = datetime.now()
-        
-        since_ts = since.timestamp()
-        until_ts = until.timestamp()
-        
-        events_list = list(docker_client.events(
-            since=since_ts,
-            until=until_ts,
-            decode=True
-        ))
-        
-        events = []
-        for event in events_list[-10:]:
-            events.append({
-                'id': event.get('id', '')[:12] if event.get('id') else '',
-                'name': event.get('Actor', {}).get('Attributes', {}).get('name', ''),
-                'status': event.get('status', ''),
-                'time': datetime.fromtimestamp(event.get('time', 0)).isoformat(),
-                'type': event.get('Type', '')
-            })
-            
+        limit = max(1, min(request.args.get('limit', default=10, type=int), 200))
+        types = parse_filter(request.args.get('type'))
+        actions = parse_filter(request.args.get('action'))
+
+        if activity_feed.ready:
+            events_list = activity_feed.recent(limit, types, actions)
+        else:
+            docker_client = docker_manager.get_client()
+            since = datetime.now() - timedelta(hours=24)
+            until = datetime.now()
+
+            events_list = deque(maxlen=limit)
+            for event in docker_client.api.events(
+                since=since.timestamp(),
+                until=until.timestamp(),
+                decode=True
+            ):
+                if event_matches(event, types, actions):
+                    events_list.append(event)
+
+        events = [format_event(event) for event in events_list]
         return jsonify(events), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def calculate_system_load():
-    cpu_percent = psutil.cpu_percent(interval=0.5)
-    memory_percent = psutil.virtual_memory().percent
-    disk_percent = psutil.disk_usage('/').percent
+@dashboard_bp.route('/activities/stream', methods=['GET'])
+@jwt_required()
+def stream_activities():
+    if not activity_feed.ready:
+        return jsonify({'error': 'Activity feed is not available yet'}), 503
 
-    system_load = (0.4 * cpu_percent) + (0.3 * memory_percent) + (0.3 * disk_percent)
-    
-    return round(system_load, 1)
+    types = parse_filter(request.args.get('type'))
+    actions = parse_filter(request.args.get('action'))
+    keepalive = current_app.config['SSE_KEEPALIVE_SECONDS']
 
-def load_previous_stats():
-    try:
-        if os.path.exists(STATS_FILE):
-            with open(STATS_FILE, 'r') as f:
-                return json.load(f)
-        return {}
-    except Exception:
-        return {}
-
-def save_current_stats(stats):
-    try:
-        with open(STATS_FILE, 'w') as f:
-            json.dump(stats, f)
-    except Exception:
-        pass
+    def generate():
+        subscriber = activity_feed.subscribe()
+        try:
+            while True:
+                try:
+                    event = subscriber.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if event_matches(event, types, actions):
+                    yield f"data: {json.dumps(format_event(event))}\n\n"
+        finally:
+            activity_feed.unsubscribe(subscriber)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def parse_filter(value):
+    return {item.strip() for item in value.split(',') if item.strip()} if value else None
+
+def format_event(event):
+    return {
+        'id': event.get('id', '')[:12] if event.get('id') else '',
+        'name': event.get('Actor', {}).get('Attributes', {}).get('name', ''),
+        'status': event.get('status') or event.get('Action', ''),
+        'time': datetime.fromtimestamp(event.get('time', 0)).isoformat(),
+        'type': event.get('Type', '')
+    }
+
+def calculate_window_change(name, current, window):
+    previous = metrics.value_ago(name, window)
+    if previous is None:
+        return 0
+    return calculate_change(previous, current)
 
 def calculate_change(previous, current):
     if previous == 0:
@@ -1,3 +1,27 @@
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
\ No newline at end of file
+from services.activity_feed import ActivityFeed
+from services.docker_manager import DockerManager
+from services.elevation import ElevationCache
+from services.inventory import Inventory
+from services.jobs import JobQueue
+from services.metrics import MetricsStore
+from services.pull_manager import PullManager
+from services.stats_hub import StatsHub
+from services.system_sampler import SystemSampler
+from services.user_cache import UserCache
+
+# Constructing these only records defaults: Docker clients, pools and
+# threads are created by init_app or on first use, so building them eagerly
+# costs nothing measurable at startup.
+db = SQLAlchemy()
+docker_manager = DockerManager()
+inventory = Inventory(docker_manager)
+system_sampler = SystemSampler()
+metrics = MetricsStore(system_sampler, inventory)
+activity_feed = ActivityFeed(docker_manager, inventory)
+stats_hub = StatsHub(docker_manager)
+jobs = JobQueue()
+pull_manager = PullManager(docker_manager)
+elevation = ElevationCache()
+user_cache = UserCache()
\ No newline at end of file
@@ -1,6 +1,9 @@
 from extensions import db
 from datetime import datetime, timezone
 
+# Bump whenever a model changes so create_app re-runs schema creation.
+SCHEMA_VERSION = 1
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -12,4 +15,26 @@ class User(db.Model):
 class Tools(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(80), unique=True, nullable=False)
-    installed = db.Column(db.Boolean, nullable=False)
\ No newline at end of file
+    installed = db.Column(db.Boolean, nullable=False)
+
+class BuildCache(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    digest = db.Column(db.String(64), unique=True, nullable=False)
+    image_id = db.Column(db.String(80), nullable=False)
+    image_tag = db.Column(db.String(80), nullable=False)
+    hits = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    last_used_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+
+class ComposeProject(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(64), unique=True, nullable=False)
+    compose_file = db.Column(db.Text, nullable=False)
+    plan = db.Column(db.JSON, nullable=False)
+    service_hashes = db.Column(db.JSON, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    last_job_id = db.Column(db.String(32), nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    deployed_at = db.Column(db.DateTime, nullable=True)
\ No newline at end of file
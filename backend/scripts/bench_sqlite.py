@@ -0,0 +1,119 @@
+"""Measure SQLite read/write throughput under concurrent load.
+
+Runs the same mixed workload against a scratch database twice: once with
+SQLite's defaults and once with the engine settings the app uses (WAL,
+synchronous=NORMAL, busy timeout, pooled connections), and prints the
+operations per second and lock errors of each.
+
+Usage (from the backend directory):
+    python scripts/bench_sqlite.py [--threads 8] [--seconds 5] [--write-ratio 0.2]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.database import sqlite_pragmas, tune_sqlite_engine  # noqa: E402
+
+ROWS = 1000
+
+
+def make_engine(path, tuned, threads):
+    if not tuned:
+        return create_engine(f"sqlite:///{path}", connect_args={'check_same_thread': False})
+    engine = create_engine(
+        f"sqlite:///{path}",
+        pool_size=threads,
+        max_overflow=0,
+        connect_args={'timeout': 5, 'check_same_thread': False, 'cached_statements': 256}
+    )
+    tune_sqlite_engine(engine, sqlite_pragmas())
+    return engine
+
+
+def prepare(engine):
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS bench"))
+        connection.execute(text("CREATE TABLE bench (id INTEGER PRIMARY KEY, name TEXT, counter INTEGER)"))
+        connection.execute(
+            text("INSERT INTO bench (id, name, counter) VALUES (:id, :name, 0)"),
+            [{'id': row, 'name': f"user{row}"} for row in range(ROWS)]
+        )
+
+
+def worker(engine, deadline, write_ratio, totals, lock):
+    reads = writes = errors = 0
+    rng = random.Random()
+    while time.monotonic() < deadline:
+        row = rng.randrange(ROWS)
+        try:
+            if rng.random() < write_ratio:
+                with engine.begin() as connection:
+                    connection.execute(text("UPDATE bench SET counter = counter + 1 WHERE id = :id"), {'id': row})
+                writes += 1
+            else:
+                with engine.connect() as connection:
+                    connection.execute(text("SELECT name, counter FROM bench WHERE id = :id"), {'id': row}).fetchone()
+                reads += 1
+        except OperationalError:
+            errors += 1
+    with lock:
+        totals['reads'] += reads
+        totals['writes'] += writes
+        totals['errors'] += errors
+
+
+def run(path, tuned, threads, seconds, write_ratio):
+    engine = make_engine(path, tuned, threads)
+    prepare(engine)
+
+    totals = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+    workers = [
+        threading.Thread(target=worker, args=(engine, deadline, write_ratio, totals, lock))
+        for _ in range(threads)
+    ]
+    started = time.monotonic()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.monotonic() - started
+    engine.dispose()
+
+    return {
+        'reads_per_second': totals['reads'] / elapsed,
+        'writes_per_second': totals['writes'] / elapsed,
+        'errors': totals['errors'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for label, tuned in (('default', False), ('tuned', True)):
+            path = os.path.join(directory, f"{label}.db")
+            result = run(path, tuned, args.threads, args.seconds, args.write_ratio)
+            print(
+                f"{label:>8}: {result['reads_per_second']:10.0f} reads/s "
+                f"{result['writes_per_second']:10.0f} writes/s "
+                f"{result['errors']:6d} lock errors"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required
 
 import docker
@@ -23,4 +23,12 @@ def list_tools():
             "installed": tool.installed
         }
         for tool in tools
-    ])
\ No newline at end of file
+    ])
+
+@server_bp.route('/api/server/startup', methods=['GET'])
+@jwt_required()
+def startup_report():
+    report = current_app.extensions.get('startup_report')
+    if report is None:
+        return jsonify({"message": "No startup report available"}), 404
+    return jsonify(report.to_dict()), 200
\ No newline at end of file
@@ -0,0 +1,151 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+def event_key(event):
+    actor = event.get('Actor', {})
+    return (event.get('timeNano') or event.get('time'), event.get('Type'), actor.get('ID'), event.get('Action'))
+
+
+def event_matches(event, types=None, actions=None):
+    if types and event.get('Type') not in types:
+        return False
+    if actions and event.get('Action', '').split(':')[0] not in actions:
+        return False
+    return True
+
+
+class ActivityFeed:
+    """Bounded window of recent Docker events.
+
+    On start the last BACKFILL seconds are streamed once from the daemon into
+    a fixed-size deque; after that the feed is kept current from the
+    inventory's event stream, so no request ever has to read the daemon's
+    event log. Whenever the inventory resyncs after its stream dropped, the
+    gap since the last event seen is backfilled the same way, and the feed
+    is not ready (callers fall back to the daemon) until it has been. Live
+    subscribers (SSE clients) each get a bounded queue and simply miss
+    events if they fall too far behind.
+    """
+
+    def __init__(self, docker_manager, inventory, app=None):
+        self._docker_manager = docker_manager
+        self._inventory = inventory
+        self._events = deque(maxlen=200)
+        self._keys = set()
+        self._pending = deque(maxlen=200)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = None
+        self._backfill_requested = False
+        self._covered_until = None
+        self.backfill_seconds = 24 * 3600
+        self.subscriber_queue_size = 100
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._events = deque(maxlen=app.config.get('ACTIVITY_BUFFER_SIZE', self._events.maxlen))
+        self._pending = deque(maxlen=self._events.maxlen)
+        self.backfill_seconds = app.config.get('ACTIVITY_BACKFILL_SECONDS', self.backfill_seconds)
+        self.subscriber_queue_size = app.config.get('ACTIVITY_SUBSCRIBER_QUEUE_SIZE', self.subscriber_queue_size)
+        app.extensions['activity_feed'] = self
+        # Live updates ride on the inventory's event stream; without it the
+        # feed would go stale, so leave it unready and let callers fall back.
+        if self._inventory.enabled:
+            self._inventory.subscribe(self._on_event)
+            self._inventory.on_sync(self.start)
+
+    @property
+    def ready(self):
+        return self._ready.is_set() and self._inventory.ready
+
+    def start(self):
+        """Backfill from the daemon's event log, then follow live events."""
+        with self._lock:
+            self._ready.clear()
+            self._backfill_requested = True
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._backfill, name='activity-backfill', daemon=True)
+            self._thread.start()
+
+    def recent(self, limit=10, types=None, actions=None):
+        with self._lock:
+            events = [event for event in self._events if event_matches(event, types, actions)]
+        return events[-limit:] if limit else events
+
+    def subscribe(self, subscriber=None):
+        """Register a queue for live events and return it.
+
+        Any object with a thread-safe put_nowait() that raises queue.Full
+        when it cannot keep up will do; by default a bounded queue.Queue.
+        """
+        if subscriber is None:
+            subscriber = queue.Queue(maxsize=self.subscriber_queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _backfill(self):
+        while True:
+            with self._lock:
+                if not self._backfill_requested:
+                    self._ready.set()
+                    return
+                self._backfill_requested = False
+                since = self._covered_until or time.time() - self.backfill_seconds
+
+            until = time.time()
+            try:
+                client = self._docker_manager.get_client()
+                stream = client.api.events(since=since, until=until, decode=True)
+                backlog = deque(stream, maxlen=self._events.maxlen)
+            except Exception as e:
+                logger.warning(f"Activity backfill failed: {str(e)}")
+                backlog = None
+
+            with self._lock:
+                # Overlap with events already held is dropped by _append.
+                for event in list(backlog or []) + list(self._pending):
+                    self._append(event)
+                self._pending.clear()
+                if backlog is not None:
+                    self._covered_until = max(self._covered_until or 0, until)
+
+    def _on_event(self, event):
+        with self._lock:
+            if not self._ready.is_set():
+                self._pending.append(event)
+                return
+            if not self._append(event):
+                return
+            if event.get('time'):
+                self._covered_until = max(self._covered_until or 0, event['time'])
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                pass
+
+    def _append(self, event):
+        key = event_key(event)
+        if key in self._keys:
+            return False
+        if len(self._events) == self._events.maxlen:
+            self._keys.discard(event_key(self._events[0]))
+        self._events.append(event)
+        self._keys.add(key)
+        return True
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import os
+from urllib.parse import quote, urlencode
+
+DEFAULT_SOCKET_PATH = '/var/run/docker.sock'
+READ_SIZE = 64 * 1024
+
+
+class AsyncDockerError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class AsyncDockerClient:
+    """Minimal asyncio client for the Docker Engine API over its unix socket.
+
+    Only what the streaming endpoints need: plain GETs returning JSON and
+    GETs whose (possibly chunked) body is consumed incrementally. Every
+    request uses its own connection, so an idle stream costs one socket and
+    one coroutine rather than a thread.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH):
+        self.socket_path = socket_path
+
+    @classmethod
+    def from_env(cls):
+        docker_host = os.getenv('DOCKER_HOST', f"unix://{DEFAULT_SOCKET_PATH}")
+        if not docker_host.startswith('unix://'):
+            raise RuntimeError(f"The async Docker client only supports unix sockets, got {docker_host}")
+        return cls(docker_host[len('unix://'):])
+
+    async def _open(self, path, params):
+        query = urlencode({key: value for key, value in (params or {}).items() if value is not None})
+        target = f"{path}?{query}" if query else path
+        reader, writer = await asyncio.open_unix_connection(self.socket_path, limit=READ_SIZE * 2)
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: docker\r\nConnection: close\r\n\r\n".encode('ascii'))
+        await writer.drain()
+
+        status_line = await reader.readline()
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            writer.close()
+            raise AsyncDockerError(502, "Invalid response from Docker daemon")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return status, headers, reader, writer
+
+    async def _body(self, headers, reader):
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size_line = await reader.readline()
+                size = int(size_line.split(b';')[0].strip() or b'0', 16)
+                if size == 0:
+                    return
+                remaining = size
+                while remaining:
+                    chunk = await reader.read(min(remaining, READ_SIZE))
+                    if not chunk:
+                        return
+                    remaining -= len(chunk)
+                    yield chunk
+                await reader.readline()
+        elif 'content-length' in headers:
+            remaining = int(headers['content-length'])
+            while remaining:
+                chunk = await reader.read(min(remaining, READ_SIZE))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+        else:
+            while True:
+                chunk = await reader.read(READ_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+    async def _raise_for_status(self, status, headers, reader):
+        if status < 400:
+            return
+        body = b''.join([chunk async for chunk in self._body(headers, reader)])
+        try:
+            message = json.loads(body).get('message', '')
+        except ValueError:
+            message = body.decode('utf-8', errors='replace')
+        raise AsyncDockerError(status, message or f"Docker API returned {status}")
+
+    async def stream(self, path, params=None):
+        """Yield the raw body of a GET request as it arrives."""
+        status, headers, reader, writer = await self._open(path, params)
+        try:
+            await self._raise_for_status(status, headers, reader)
+            async for chunk in self._body(headers, reader):
+                yield chunk
+        finally:
+            writer.close()
+
+    async def get_json(self, path, params=None):
+        chunks = [chunk async for chunk in self.stream(path, params)]
+        return json.loads(b''.join(chunks))
+
+    async def stream_json(self, path, params=None):
+        """Yield each JSON document of a newline-delimited JSON stream."""
+        buffer = bytearray()
+        async for chunk in self.stream(path, params):
+            buffer.extend(chunk)
+            while True:
+                newline = buffer.find(b'\n')
+                if newline == -1:
+                    break
+                line = bytes(buffer[:newline]).strip()
+                del buffer[:newline + 1]
+                if line:
+                    yield json.loads(line)
+
+    async def inspect_container(self, container_id):
+        return await self.get_json(f"/containers/{quote(container_id)}/json")
+
+    async def logs(self, container_id, follow=True, since=None, until=None, tail='all', tty=False):
+        """Yield container log output, demultiplexing stdout/stderr frames unless tty."""
+        params = {
+            'stdout': 1,
+            'stderr': 1,
+            'timestamps': 1,
+            'follow': 1 if follow else 0,
+            'since': since,
+            'until': until,
+            'tail': tail,
+        }
+        chunks = self.stream(f"/containers/{quote(container_id)}/logs", params)
+        if tty:
+            async for chunk in chunks:
+                yield chunk
+            return
+
+        # Each frame is an 8-byte header (stream type, 3 padding bytes,
+        # big-endian payload size) followed by the payload.
+        buffer = bytearray()
+        async for chunk in chunks:
+            buffer.extend(chunk)
+            while len(buffer) >= 8:
+                size = int.from_bytes(buffer[4:8], 'big')
+                if len(buffer) < 8 + size:
+                    break
+                payload = bytes(buffer[8:8 + size])
+                del buffer[:8 + size]
+                yield payload
+
+    def stats(self, container_id):
+        return self.stream_json(f"/containers/{quote(container_id)}/stats", {'stream': 1})
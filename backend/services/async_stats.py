@@ -0,0 +1,96 @@
+import asyncio
+import logging
+
+from services.stats_hub import StatsCapacityError, compute_stats, public_sample
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncStatsStream:
+    def __init__(self, container_id):
+        self.container_id = container_id
+        self.latest = None
+        self.subscribers = set()
+        self.idle_since = None
+        self.task = None
+
+
+class AsyncStatsHub:
+    """Asyncio counterpart of StatsHub for the ASGI serving mode.
+
+    One daemon stats stream per container runs as a task on the event loop
+    and is fanned out to every viewer's bounded queue. The stream is closed
+    once it has had no viewers for the idle timeout. At most max_streams
+    are open at once, as with StatsHub.
+    """
+
+    def __init__(self, client, idle_timeout=10, queue_size=10, max_streams=64):
+        self._client = client
+        self._streams = {}
+        self.idle_timeout = idle_timeout
+        self.queue_size = queue_size
+        self.max_streams = max_streams
+
+    def subscribe(self, container_id):
+        """Attach a viewer queue; the latest sample is delivered right away.
+
+        Raises StatsCapacityError if a new stream is needed but every slot
+        is taken by a stream that has viewers.
+        """
+        stream = self._streams.get(container_id)
+        if stream is None:
+            if len(self._streams) >= self.max_streams:
+                self._evict_unwatched()
+            stream = self._streams[container_id] = AsyncStatsStream(container_id)
+            stream.task = asyncio.ensure_future(self._run_stream(stream))
+        subscriber = asyncio.Queue(maxsize=self.queue_size)
+        stream.subscribers.add(subscriber)
+        stream.idle_since = None
+        if stream.latest is not None:
+            subscriber.put_nowait(public_sample(container_id, stream.latest))
+        return subscriber
+
+    def unsubscribe(self, container_id, subscriber):
+        stream = self._streams.get(container_id)
+        if stream is not None:
+            stream.subscribers.discard(subscriber)
+            if not stream.subscribers:
+                stream.idle_since = asyncio.get_running_loop().time()
+
+    def _evict_unwatched(self):
+        # Streams waiting out their idle timeout can be reopened later;
+        # close the one that has been unwatched longest.
+        unwatched = [stream for stream in self._streams.values() if not stream.subscribers]
+        if not unwatched:
+            raise StatsCapacityError(f"All {self.max_streams} stats streams are in use")
+        stream = min(unwatched, key=lambda candidate: candidate.idle_since)
+        del self._streams[stream.container_id]
+        stream.task.cancel()
+
+    def _publish(self, stream, payload):
+        for subscriber in stream.subscribers:
+            if subscriber.full():
+                # Viewers only care about the newest sample; drop the oldest.
+                subscriber.get_nowait()
+            subscriber.put_nowait(payload)
+
+    async def _run_stream(self, stream):
+        loop = asyncio.get_running_loop()
+        samples = self._client.stats(stream.container_id)
+        try:
+            previous = None
+            async for raw in samples:
+                if stream.idle_since is not None and loop.time() - stream.idle_since >= self.idle_timeout:
+                    break
+                previous = compute_stats(raw, previous)
+                stream.latest = previous
+                self._publish(stream, public_sample(stream.container_id, previous))
+        except Exception as e:
+            logger.warning(f"Async stats stream for {stream.container_id} ended: {str(e)}")
+        finally:
+            # Detach before awaiting anything so no new viewer joins a dying stream.
+            if self._streams.get(stream.container_id) is stream:
+                del self._streams[stream.container_id]
+            # Wake any viewers still attached so their responses can finish.
+            self._publish(stream, None)
+            await samples.aclose()
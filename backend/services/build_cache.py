@@ -0,0 +1,113 @@
+import hashlib
+import logging
+from datetime import datetime, timezone
+
+import docker
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import BuildCache
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def hash_bytes(kind, data):
+    digest = hashlib.sha256(f"{kind}\0".encode())
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def save_and_hash(kind, stream, path):
+    """Copy an upload to path, hashing it in the same single pass."""
+    digest = hashlib.sha256(f"{kind}\0".encode())
+    with open(path, 'wb') as target:
+        while True:
+            chunk = stream.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            target.write(chunk)
+    return digest.hexdigest()
+
+
+def image_tag_for(digest):
+    return f"local-build-{digest[:12]}"
+
+
+def lookup(client, digest):
+    """Return the cached image ID for a context digest if the image still exists."""
+    entry = BuildCache.query.filter_by(digest=digest).first()
+    if entry is None:
+        return None
+    try:
+        client.api.inspect_image(entry.image_id)
+    except docker.errors.ImageNotFound:
+        db.session.delete(entry)
+        db.session.commit()
+        return None
+
+    entry.hits += 1
+    entry.last_used_at = datetime.now(timezone.utc)
+    db.session.commit()
+    return entry.image_id
+
+
+def record(client, digest, image_tag):
+    image_id = client.api.inspect_image(image_tag)['Id']
+    entry = BuildCache.query.filter_by(digest=digest).first()
+    if entry is None:
+        entry = BuildCache(digest=digest)
+        db.session.add(entry)
+    _update_entry(entry, image_id, image_tag)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent build of the same context recorded it first; both
+        # built the same tag, so refresh that row instead.
+        db.session.rollback()
+        _update_entry(BuildCache.query.filter_by(digest=digest).one(), image_id, image_tag)
+        db.session.commit()
+    return image_id
+
+
+def _update_entry(entry, image_id, image_tag):
+    entry.image_id = image_id
+    entry.image_tag = image_tag
+    entry.last_used_at = datetime.now(timezone.utc)
+
+
+def evict(client):
+    """Drop least recently used entries beyond the cap and untag their images.
+
+    Images still referenced by a container cannot be removed; those are left
+    in place and only forgotten by the cache.
+    """
+    max_entries = current_app.config['BUILD_CACHE_MAX_ENTRIES']
+    stale = BuildCache.query.order_by(BuildCache.last_used_at.desc()).offset(max_entries).all()
+    for entry in stale:
+        _remove_image(client, entry.image_tag)
+        db.session.delete(entry)
+    db.session.commit()
+
+
+def collect_garbage(client):
+    """Remove old local-build images that no cache entry points at any more."""
+    known_tags = {entry.image_tag for entry in BuildCache.query.all()}
+    min_age = current_app.config['BUILD_CACHE_GC_AGE']
+    now = datetime.now(timezone.utc).timestamp()
+    for image in client.api.images(filters={'reference': 'local-build-*'}):
+        if now - image.get('Created', now) < min_age:
+            continue
+        for tag in image.get('RepoTags') or []:
+            if tag.split(':')[0].startswith('local-build-') and tag.split(':')[0] not in known_tags:
+                _remove_image(client, tag)
+
+
+def _remove_image(client, image_tag):
+    try:
+        client.api.remove_image(image_tag)
+    except docker.errors.APIError as e:
+        logger.info(f"Keeping build image {image_tag}: {str(e)}")
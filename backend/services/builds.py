@@ -0,0 +1,197 @@
+import io
+import os
+import posixpath
+import re
+import socket
+import stat
+import tarfile
+import time
+import zipfile
+
+import docker
+
+from services import build_cache
+
+BUILT_IMAGE_PATTERN = re.compile(r'Successfully built ([0-9a-f]+)')
+
+TAR_BLOCK_SIZE = tarfile.BLOCKSIZE
+ZIP_READ_SIZE = 64 * 1024
+
+
+def find_zip_dockerfile(names):
+    """Pick the shallowest Dockerfile entry of a ZIP archive, or None."""
+    candidates = [
+        name for name in names
+        if not name.endswith('/') and os.path.basename(name).lower() == 'dockerfile'
+    ]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda name: (name.count('/'), name))
+
+
+def _zip_entry_tarinfo(info, name):
+    mode = (info.external_attr >> 16) & 0o177777
+    tarinfo = tarfile.TarInfo(name)
+    tarinfo.mtime = time.mktime(info.date_time + (0, 0, -1))
+    if info.is_dir():
+        tarinfo.type = tarfile.DIRTYPE
+        tarinfo.mode = stat.S_IMODE(mode) or 0o755
+    elif stat.S_ISLNK(mode):
+        tarinfo.type = tarfile.SYMTYPE
+        tarinfo.mode = 0o777
+    else:
+        tarinfo.mode = stat.S_IMODE(mode) or 0o644
+        tarinfo.size = info.file_size
+    return tarinfo
+
+
+def iter_zip_as_tar(zip_ref, context_dir, job=None):
+    """Yield a tar build context for context_dir straight out of a ZIP.
+
+    Entries are read from the archive one chunk at a time and framed as tar
+    members on the fly, so nothing is extracted to disk and memory use stays
+    at one read buffer regardless of the archive size.
+    """
+    prefix = f"{context_dir}/" if context_dir else ''
+    for info in zip_ref.infolist():
+        if not info.filename.startswith(prefix):
+            continue
+        name = posixpath.normpath(info.filename[len(prefix):])
+        if name in ('', '.') or name.startswith(('/', '../')) or name == '..':
+            continue
+
+        if job is not None:
+            job.check_cancelled()
+
+        tarinfo = _zip_entry_tarinfo(info, name)
+        if tarinfo.type == tarfile.SYMTYPE:
+            tarinfo.linkname = zip_ref.read(info).decode('utf-8', errors='surrogateescape')
+        yield tarinfo.tobuf(format=tarfile.PAX_FORMAT, encoding='utf-8', errors='surrogateescape')
+
+        if tarinfo.type != tarfile.REGTYPE:
+            continue
+        with zip_ref.open(info) as member:
+            while True:
+                chunk = member.read(ZIP_READ_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        padding = -info.file_size % TAR_BLOCK_SIZE
+        if padding:
+            yield b'\0' * padding
+
+    yield b'\0' * (2 * TAR_BLOCK_SIZE)
+
+
+def abort_response(response):
+    """Cut a streamed response off, waking a thread blocked reading it.
+
+    The socket is shut down rather than closed, since only a shutdown
+    reliably interrupts a read in progress on another thread. The daemon
+    sees the disconnect and stops the build.
+    """
+    connection = getattr(response.raw, '_connection', None)
+    sock = getattr(connection, 'sock', None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+def abort_on_cancel(job, client):
+    """Make cancelling job abort the streamed responses of client."""
+    def register(response, *args, **kwargs):
+        job.on_cancel(lambda: abort_response(response))
+        return response
+
+    client.api.hooks['response'].append(register)
+
+
+def stream_build(job, client, **build_kwargs):
+    """Run a build, copying its output into the job log as it is produced."""
+    image_id = None
+    try:
+        for chunk in client.api.build(decode=True, rm=True, **build_kwargs):
+            job.check_cancelled()
+            if 'error' in chunk:
+                raise docker.errors.BuildError(chunk['error'].strip(), [])
+            if 'stream' in chunk:
+                line = chunk['stream'].rstrip('\n')
+                if line.strip():
+                    job.log(line)
+                match = BUILT_IMAGE_PATTERN.search(line)
+                if match:
+                    image_id = image_id or match.group(1)
+            elif 'status' in chunk:
+                job.log(f"{chunk['status']} {chunk.get('progress', '')}".rstrip())
+            if 'aux' in chunk and 'ID' in chunk['aux']:
+                image_id = chunk['aux']['ID']
+    except Exception:
+        # An aborted stream surfaces as a read error; report the cancel instead.
+        job.check_cancelled()
+        raise
+    # An aborted stream may also just end early.
+    job.check_cancelled()
+
+    if image_id is None:
+        raise docker.errors.BuildError("Build finished without producing an image", [])
+    return image_id
+
+
+def build_and_create(job, docker_manager, name, digest, **build_kwargs):
+    image_tag = build_cache.image_tag_for(digest)
+    # Builds can run for minutes: use a dedicated connection without a read
+    # timeout so a quiet build step is not mistaken for a dead daemon.
+    stream_client = docker_manager.create_stream_client()
+    # A quiet step (RUN sleep, a long compile) never reaches a
+    # check_cancelled(), so cancelling has to break the read itself.
+    abort_on_cancel(job, stream_client)
+    try:
+        stream_build(job, stream_client, tag=image_tag, **build_kwargs)
+    finally:
+        stream_client.close()
+
+    client = docker_manager.get_client()
+    image_id = build_cache.record(client, digest, image_tag)
+    try:
+        build_cache.evict(client)
+        build_cache.collect_garbage(client)
+    except Exception as e:
+        job.log(f"Build cache cleanup failed: {str(e)}")
+
+    job.check_cancelled()
+    container = client.containers.create(
+        image=image_tag,
+        name=name,
+        detach=True
+    )
+    job.log(f"Created container {container.short_id}")
+    return {
+        "container_id": container.id,
+        "image_id": image_id,
+        "image_tag": image_tag
+    }
+
+
+def run_dockerfile_build(job, docker_manager, dockerfile, name, digest):
+    return build_and_create(job, docker_manager, name, digest, fileobj=io.BytesIO(dockerfile))
+
+
+def run_zip_build(job, docker_manager, zip_path, name, digest):
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            dockerfile_name = find_zip_dockerfile(zip_ref.namelist())
+            if dockerfile_name is None:
+                raise ValueError("No Dockerfile found in the ZIP archive")
+
+            context_dir, dockerfile = posixpath.split(dockerfile_name)
+            return build_and_create(
+                job, docker_manager, name, digest,
+                fileobj=iter_zip_as_tar(zip_ref, context_dir, job),
+                custom_context=True,
+                dockerfile=dockerfile
+            )
+    finally:
+        if os.path.exists(zip_path):
+            os.remove(zip_path)
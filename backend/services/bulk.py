@@ -0,0 +1,92 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import docker
+
+BULK_ACTIONS = ('start', 'stop', 'restart', 'pause', 'unpause', 'remove')
+
+
+def _run_action(client, action, container_id, stop_timeout):
+    api = client.api
+    if action == 'start':
+        api.start(container_id)
+    elif action == 'stop':
+        api.stop(container_id, timeout=stop_timeout)
+    elif action == 'restart':
+        api.restart(container_id, timeout=stop_timeout)
+    elif action == 'pause':
+        api.pause(container_id)
+    elif action == 'unpause':
+        api.unpause(container_id)
+    elif action == 'remove':
+        # Without force the daemon refuses to remove a running container.
+        api.remove_container(container_id)
+
+
+def _error_message(action, error):
+    message = error.explanation if isinstance(error, docker.errors.APIError) and error.explanation else str(error)
+    if action in ('start', 'restart') and "port is already allocated" in message:
+        port_match = re.search(r'Bind for 0.0.0.0:(\d+)', message)
+        if port_match:
+            return f"Port {port_match.group(1)} is already in use"
+    return message
+
+
+def _apply(client, action, container_id, stop_timeout):
+    try:
+        _run_action(client, action, container_id, stop_timeout)
+        return {"id": container_id, "status": "succeeded"}
+    except docker.errors.NotFound:
+        return {"id": container_id, "status": "failed", "message": "Container not found"}
+    except Exception as e:
+        return {"id": container_id, "status": "failed", "message": _error_message(action, e)}
+
+
+def run_bulk(docker_manager, action, container_ids, stop_timeout, max_workers, deadline):
+    """Apply one lifecycle action to many containers concurrently.
+
+    Returns one result per container, in request order. Containers whose
+    call has not finished within deadline seconds are reported as timed out
+    and their calls are left to complete in the background; those whose
+    call had not even started by then are skipped.
+    """
+    if not container_ids:
+        return []
+
+    workers = min(max_workers, len(container_ids))
+    client = docker_manager.create_batch_client(workers)
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulk')
+    futures = [executor.submit(_apply, client, action, container_id, stop_timeout) for container_id in container_ids]
+    _close_when_done(client, futures)
+    try:
+        wait(futures, timeout=deadline)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for container_id, future in zip(container_ids, futures):
+        if future.cancelled():
+            results.append({"id": container_id, "status": "skipped", "message": "Operation was not started in time"})
+        elif future.done():
+            results.append(future.result())
+        else:
+            results.append({"id": container_id, "status": "timeout", "message": "Operation did not finish in time"})
+    return results
+
+
+def _close_when_done(client, futures):
+    # Calls still running past the deadline keep using the client, so it is
+    # closed by whichever future settles last rather than by the request.
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def settled(_future):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        client.close()
+
+    for future in futures:
+        future.add_done_callback(settled)
@@ -0,0 +1,516 @@
+import hashlib
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import docker
+import yaml
+
+from services.jobs import JobCancelled
+from services.pull_manager import wait_for_pull
+
+PROJECT_LABEL = 'com.docker.compose.project'
+SERVICE_LABEL = 'com.docker.compose.service'
+CONFIG_HASH_LABEL = 'com.docker.compose.config-hash'
+NETWORK_LABEL = 'com.docker.compose.network'
+VOLUME_LABEL = 'com.docker.compose.volume'
+
+PROJECT_NAME_PATTERN = re.compile(r'^[a-z0-9][a-z0-9_-]*$')
+SERVICE_NAME_PATTERN = re.compile(r'^[a-zA-Z0-9][a-zA-Z0-9_.-]*$')
+
+SUPPORTED_SERVICE_KEYS = {
+    'image', 'command', 'entrypoint', 'environment', 'ports', 'volumes', 'networks',
+    'depends_on', 'restart', 'labels', 'working_dir', 'user', 'hostname', 'container_name',
+}
+SUPPORTED_SERVICE_NETWORK_KEYS = {'aliases'}
+SUPPORTED_RESOURCE_KEYS = {
+    'network': {'name', 'external', 'driver', 'driver_opts', 'labels', 'internal', 'attachable'},
+    'volume': {'name', 'external', 'driver', 'driver_opts', 'labels'},
+}
+
+INTERPOLATION_PATTERN = re.compile(r'\$(\{|[A-Za-z_])')
+
+
+def normalize_project_name(name):
+    project = re.sub(r'[^a-z0-9_-]', '', (name or '').lower())
+    if not PROJECT_NAME_PATTERN.match(project) or len(project) > 64:
+        raise ValueError("Invalid project name")
+    return project
+
+
+def _unescape_dollars(value, path):
+    """Reject ${VAR} interpolation and turn $$ escapes into a literal $.
+
+    There is no shell environment or .env file to interpolate from, and
+    passing the references through literally would silently misconfigure
+    the containers.
+    """
+    if isinstance(value, dict):
+        return {key: _unescape_dollars(item, f"{path}.{key}" if path else str(key)) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_unescape_dollars(item, path) for item in value]
+    if isinstance(value, str):
+        parts = value.split('$$')
+        if any(INTERPOLATION_PATTERN.search(part) for part in parts):
+            raise ValueError(f"{path}: variable interpolation is not supported, use literal values (or $$ for a literal $)")
+        return '$'.join(parts)
+    return value
+
+
+def _as_mapping(value, field, service):
+    if value is None:
+        return {}
+    if isinstance(value, dict):
+        return {str(key): value[key] for key in value}
+    if isinstance(value, list):
+        mapping = {}
+        for item in value:
+            key, has_value, item_value = str(item).partition('=')
+            mapping[key] = item_value if has_value else None
+        return mapping
+    raise ValueError(f"Service {service}: invalid {field}")
+
+
+def _normalize_environment(value, service):
+    # Variables without a value would be read from the compose shell, which
+    # does not exist here, so they are dropped.
+    return {
+        key: str(item).lower() if isinstance(item, bool) else str(item)
+        for key, item in _as_mapping(value, 'environment', service).items()
+        if item is not None
+    }
+
+
+def _normalize_port(port, service):
+    if isinstance(port, dict):
+        target = port.get('target')
+        if target is None:
+            raise ValueError(f"Service {service}: port mapping without a target")
+        return {
+            'container': f"{target}/{port.get('protocol', 'tcp')}",
+            'host_ip': str(port.get('host_ip', '')).strip('[]'),
+            'host_port': str(port.get('published', '')),
+        }
+
+    spec, _, protocol = str(port).partition('/')
+    host_ip = ''
+    if spec.startswith('['):
+        # IPv6 host addresses are bracketed: "[::1]:8080:80".
+        host_ip, closed, spec = spec[1:].partition(']')
+        if not closed or not spec.startswith(':'):
+            raise ValueError(f"Service {service}: invalid port {port}")
+        parts = spec[1:].split(':')
+        if len(parts) != 2:
+            raise ValueError(f"Service {service}: invalid port {port}")
+    else:
+        parts = spec.split(':')
+        if len(parts) > 3:
+            raise ValueError(f"Service {service}: invalid port {port}")
+        if len(parts) == 3:
+            host_ip = parts.pop(0)
+    if any('-' in part for part in parts):
+        raise ValueError(f"Service {service}: port ranges are not supported")
+    target = parts[-1]
+    host_port = parts[-2] if len(parts) > 1 else ''
+    if not target.isdigit() or (host_port and not host_port.isdigit()):
+        raise ValueError(f"Service {service}: invalid port {port}")
+    return {'container': f"{target}/{protocol or 'tcp'}", 'host_ip': host_ip, 'host_port': host_port}
+
+
+def _normalize_volume(volume, service, declared_volumes):
+    if isinstance(volume, dict):
+        source = volume.get('source', '')
+        target = volume.get('target')
+        mode = 'ro' if volume.get('read_only') else 'rw'
+    else:
+        parts = str(volume).split(':')
+        if len(parts) == 1:
+            source, target, mode = '', parts[0], 'rw'
+        else:
+            source, target = parts[0], parts[1]
+            mode = parts[2] if len(parts) > 2 else 'rw'
+
+    if not target or not target.startswith('/'):
+        raise ValueError(f"Service {service}: invalid volume {volume}")
+    if source.startswith('.') or source.startswith('~'):
+        raise ValueError(f"Service {service}: relative bind mounts are not supported for uploaded compose files")
+    if source and not source.startswith('/') and source not in declared_volumes:
+        raise ValueError(f"Service {service}: volume {source} is not declared")
+    return {'source': source, 'target': target, 'mode': mode}
+
+
+def _normalize_restart(value):
+    if not value or value == 'no':
+        return None
+    name, _, retries = str(value).partition(':')
+    if name not in ('always', 'unless-stopped', 'on-failure'):
+        raise ValueError(f"Invalid restart policy {value}")
+    return {'Name': name, 'MaximumRetryCount': int(retries) if retries.isdigit() else 0}
+
+
+def normalize_service(name, spec, declared_networks, declared_volumes):
+    if not SERVICE_NAME_PATTERN.match(name):
+        raise ValueError(f"Invalid service name {name}")
+    if not isinstance(spec, dict):
+        raise ValueError(f"Service {name}: definition must be a mapping")
+    if 'build' in spec:
+        raise ValueError(f"Service {name}: build is not supported for uploaded compose files")
+    if not spec.get('image'):
+        raise ValueError(f"Service {name}: image is required")
+    unsupported = sorted(set(spec) - SUPPORTED_SERVICE_KEYS)
+    if unsupported:
+        raise ValueError(f"Service {name}: unsupported keys {', '.join(unsupported)}")
+
+    networks = spec.get('networks') or ['default']
+    aliases = {}
+    if isinstance(networks, dict):
+        for network, options in networks.items():
+            options = options or {}
+            unsupported = sorted(set(options) - SUPPORTED_SERVICE_NETWORK_KEYS)
+            if unsupported:
+                raise ValueError(f"Service {name}: unsupported options {', '.join(unsupported)} for network {network}")
+            if options.get('aliases'):
+                aliases[network] = sorted(str(alias) for alias in options['aliases'])
+    networks = sorted(networks)
+    for network in networks:
+        if network not in declared_networks:
+            raise ValueError(f"Service {name}: network {network} is not declared")
+
+    depends_on = spec.get('depends_on') or []
+    # Only start order is honoured; health conditions are not waited on.
+    depends_on = sorted(depends_on if isinstance(depends_on, list) else depends_on.keys())
+
+    return {
+        'image': str(spec['image']),
+        'command': spec.get('command'),
+        'entrypoint': spec.get('entrypoint'),
+        'environment': _normalize_environment(spec.get('environment'), name),
+        'ports': [_normalize_port(port, name) for port in spec.get('ports') or []],
+        'volumes': [_normalize_volume(volume, name, declared_volumes) for volume in spec.get('volumes') or []],
+        'networks': networks,
+        'aliases': aliases,
+        'depends_on': depends_on,
+        'restart': _normalize_restart(spec.get('restart')),
+        'labels': {key: str(value) for key, value in _as_mapping(spec.get('labels'), 'labels', name).items()},
+        'working_dir': spec.get('working_dir'),
+        'user': spec.get('user'),
+        'hostname': spec.get('hostname'),
+        'container_name': spec.get('container_name'),
+    }
+
+
+def config_hash(service):
+    return hashlib.sha256(json.dumps(service, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _normalize_resources(project, declared, kind):
+    resources = {}
+    for name, spec in (declared or {}).items():
+        spec = spec or {}
+        unsupported = sorted(set(spec) - SUPPORTED_RESOURCE_KEYS[kind])
+        if unsupported:
+            raise ValueError(f"{kind.capitalize()} {name}: unsupported keys {', '.join(unsupported)}")
+        external = bool(spec.get('external'))
+        resources[name] = {
+            'name': str(spec.get('name', name if external else f"{project}_{name}")),
+            'external': external,
+            'driver': None if external else spec.get('driver'),
+            'options': {} if external else {
+                key: str(value) for key, value in _as_mapping(spec.get('driver_opts'), 'driver_opts', name).items()
+            },
+            'labels': {} if external else {
+                key: str(value) for key, value in _as_mapping(spec.get('labels'), 'labels', name).items()
+            },
+        }
+        if kind == 'network':
+            resources[name]['internal'] = bool(spec.get('internal'))
+            resources[name]['attachable'] = bool(spec.get('attachable'))
+    if kind == 'network' and 'default' not in resources:
+        resources['default'] = {
+            'name': f"{project}_default", 'external': False, 'driver': None,
+            'options': {}, 'labels': {}, 'internal': False, 'attachable': False,
+        }
+    return resources
+
+
+def dependency_waves(services):
+    """Group services into waves that only depend on earlier waves."""
+    remaining = {name: set(service['depends_on']) for name, service in services.items()}
+    for name, dependencies in remaining.items():
+        unknown = dependencies - set(services)
+        if unknown:
+            raise ValueError(f"Service {name} depends on unknown service {', '.join(sorted(unknown))}")
+
+    waves = []
+    placed = set()
+    while remaining:
+        wave = sorted(name for name, dependencies in remaining.items() if dependencies <= placed)
+        if not wave:
+            raise ValueError(f"Circular dependency between services {', '.join(sorted(remaining))}")
+        waves.append(wave)
+        placed.update(wave)
+        for name in wave:
+            del remaining[name]
+    return waves
+
+
+def parse_compose(text, project=None):
+    """Validate a compose file and turn it into a deploy plan.
+
+    The project name is the explicit one if given, else the file's top-level
+    name. One of them is required: the project scopes which containers a
+    deploy may recreate, so it is never guessed.
+
+    The plan holds the normalized spec and config hash of every service, the
+    concrete network and volume names, and the services grouped into
+    dependency waves. It is plain data so it can be queued or stored.
+    """
+    try:
+        document = yaml.safe_load(text)
+    except yaml.YAMLError as e:
+        raise ValueError(f"Invalid compose file: {str(e)}")
+    if not isinstance(document, dict) or not isinstance(document.get('services'), dict) or not document['services']:
+        raise ValueError("Compose file must define services")
+    document = _unescape_dollars(document, '')
+
+    project = project or document.get('name')
+    if not project:
+        raise ValueError("A project name is required, either in the request or as the compose file's top-level name")
+    project = normalize_project_name(str(project))
+    networks = _normalize_resources(project, document.get('networks'), 'network')
+    volumes = _normalize_resources(project, document.get('volumes'), 'volume')
+    services = {
+        str(name): normalize_service(str(name), spec, networks, volumes)
+        for name, spec in document['services'].items()
+    }
+
+    return {
+        'project': project,
+        'services': services,
+        'hashes': {name: config_hash(service) for name, service in services.items()},
+        'networks': networks,
+        'volumes': volumes,
+        'waves': dependency_waves(services),
+    }
+
+
+def _ensure_networks(job, client, plan):
+    used = {network for service in plan['services'].values() for network in service['networks']}
+    for logical in sorted(used):
+        network = plan['networks'][logical]
+        if client.api.networks(names=[network['name']]):
+            continue
+        if network['external']:
+            raise ValueError(f"External network {network['name']} does not exist")
+        client.api.create_network(
+            network['name'],
+            driver=network['driver'],
+            options=network.get('options') or None,
+            internal=network.get('internal', False),
+            attachable=network.get('attachable'),
+            labels={**network.get('labels', {}), PROJECT_LABEL: plan['project'], NETWORK_LABEL: logical}
+        )
+        job.log(f"Created network {network['name']}")
+
+
+def _ensure_volumes(job, client, plan):
+    used = {
+        volume['source'] for service in plan['services'].values()
+        for volume in service['volumes'] if volume['source'] in plan['volumes']
+    }
+    for logical in sorted(used):
+        volume = plan['volumes'][logical]
+        try:
+            client.api.inspect_volume(volume['name'])
+            continue
+        except docker.errors.NotFound:
+            if volume['external']:
+                raise ValueError(f"External volume {volume['name']} does not exist")
+        client.api.create_volume(
+            volume['name'],
+            driver=volume['driver'],
+            driver_opts=volume.get('options') or None,
+            labels={**volume.get('labels', {}), PROJECT_LABEL: plan['project'], VOLUME_LABEL: logical}
+        )
+        job.log(f"Created volume {volume['name']}")
+
+
+def project_containers(client, project):
+    """Existing containers of a project, keyed by service name."""
+    containers = client.api.containers(all=True, filters={'label': [f"{PROJECT_LABEL}={project}"]})
+    return {container['Labels'].get(SERVICE_LABEL): container for container in containers}
+
+
+def _create_service_container(client, plan, name):
+    service = plan['services'][name]
+    api = client.api
+
+    port_bindings = {}
+    for port in service['ports']:
+        if port['host_port']:
+            binding = (port['host_ip'], int(port['host_port'])) if port['host_ip'] else int(port['host_port'])
+        elif port['host_ip']:
+            # A random host port, but only on the given address.
+            binding = (port['host_ip'],)
+        else:
+            binding = None
+        port_bindings.setdefault(port['container'], []).append(binding)
+
+    binds = []
+    anonymous_volumes = []
+    for volume in service['volumes']:
+        if not volume['source']:
+            anonymous_volumes.append(volume['target'])
+            continue
+        source = plan['volumes'][volume['source']]['name'] if volume['source'] in plan['volumes'] else volume['source']
+        binds.append(f"{source}:{volume['target']}:{volume['mode']}")
+
+    networks = [plan['networks'][network]['name'] for network in service['networks']]
+    aliases = [
+        [name] + service.get('aliases', {}).get(network, [])
+        for network in service['networks']
+    ]
+    host_config = api.create_host_config(
+        port_bindings=port_bindings,
+        binds=binds,
+        restart_policy=service['restart'],
+        network_mode=networks[0]
+    )
+    networking_config = api.create_networking_config({
+        networks[0]: api.create_endpoint_config(aliases=aliases[0])
+    })
+    labels = {
+        **service['labels'],
+        PROJECT_LABEL: plan['project'],
+        SERVICE_LABEL: name,
+        CONFIG_HASH_LABEL: plan['hashes'][name],
+        'com.docker.compose.container-number': '1',
+        'com.docker.compose.oneoff': 'False',
+    }
+
+    container = api.create_container(
+        service['image'],
+        name=service['container_name'] or f"{plan['project']}-{name}-1",
+        command=service['command'],
+        entrypoint=service['entrypoint'],
+        environment=service['environment'],
+        ports=[tuple(port.split('/')) for port in port_bindings],
+        volumes=anonymous_volumes,
+        labels=labels,
+        working_dir=service['working_dir'],
+        user=service['user'],
+        hostname=service['hostname'],
+        host_config=host_config,
+        networking_config=networking_config
+    )
+    for network, network_aliases in zip(networks[1:], aliases[1:]):
+        api.connect_container_to_network(container['Id'], network, aliases=network_aliases)
+    api.start(container['Id'])
+    return container['Id']
+
+
+def diff_project(plan, existing):
+    """Compare a plan with a project's existing containers.
+
+    Returns the change each service needs (create, recreate, start or
+    unchanged) and the names of services that have a container but are no
+    longer part of the plan.
+    """
+    changes = {}
+    for name in plan['services']:
+        container = existing.get(name)
+        if container is None:
+            changes[name] = 'create'
+        elif container['Labels'].get(CONFIG_HASH_LABEL) != plan['hashes'][name]:
+            changes[name] = 'recreate'
+        elif container['State'] != 'running':
+            changes[name] = 'start'
+        else:
+            changes[name] = 'unchanged'
+    orphans = sorted(name for name in existing if name not in plan['services'])
+    return changes, orphans
+
+
+def _apply_service(job, client, pull_manager, plan, name, change, existing):
+    job.check_cancelled()
+    service = plan['services'][name]
+
+    if change == 'unchanged':
+        job.log(f"[{name}] Unchanged")
+        return 'unchanged'
+    if change == 'start':
+        client.api.start(existing['Id'])
+        job.log(f"[{name}] Started")
+        return 'started'
+
+    if not pull_manager.image_present(service['image']):
+        wait_for_pull(job, pull_manager, service['image'])
+
+    if change == 'recreate':
+        job.log(f"[{name}] Configuration changed, recreating")
+        client.api.remove_container(existing['Id'], force=True)
+
+    _create_service_container(client, plan, name)
+    job.log(f"[{name}] {'Recreated' if change == 'recreate' else 'Created'}")
+    return 'recreated' if change == 'recreate' else 'created'
+
+
+def run_compose_deploy(job, docker_manager, pull_manager, plan, max_workers, remove_orphans=()):
+    """Deploy a parsed compose plan, one dependency wave at a time.
+
+    Services within a wave are applied concurrently. A service whose
+    container already carries the same config hash is left alone (or just
+    started), so re-applying a mostly unchanged file only touches what
+    changed. Containers of services dropped from the file are only removed
+    if they are named in remove_orphans, which the caller must have
+    authorized; other orphans are left in place.
+    """
+    client = docker_manager.get_client()
+    _ensure_networks(job, client, plan)
+    _ensure_volumes(job, client, plan)
+    existing = project_containers(client, plan['project'])
+    changes, orphans = diff_project(plan, existing)
+    approved = set(remove_orphans)
+    to_remove = [name for name in orphans if name in approved]
+    if to_remove:
+        job.log(f"Orphaned services to remove after deploy: {', '.join(to_remove)}")
+    kept = [name for name in orphans if name not in to_remove]
+    if kept:
+        job.log(f"Orphaned services left in place: {', '.join(kept)}")
+
+    widest = max(len(wave) for wave in plan['waves'])
+    workers = min(max_workers, widest)
+    batch_client = docker_manager.create_batch_client(workers)
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='compose') as executor:
+            for wave in plan['waves']:
+                job.check_cancelled()
+                futures = {
+                    name: executor.submit(
+                        _apply_service, job, batch_client, pull_manager, plan, name, changes[name], existing.get(name)
+                    )
+                    for name in wave
+                }
+                failures = []
+                for name, future in futures.items():
+                    try:
+                        results[name] = future.result()
+                    except JobCancelled:
+                        raise
+                    except Exception as e:
+                        job.log(f"[{name}] Failed: {str(e)}")
+                        failures.append(name)
+                if failures:
+                    raise RuntimeError(f"Failed to deploy services: {', '.join(failures)}")
+    finally:
+        batch_client.close()
+
+    removed = []
+    for name in to_remove:
+        job.check_cancelled()
+        client.api.remove_container(existing[name]['Id'], force=True)
+        job.log(f"[{name}] Removed orphan container")
+        removed.append(name)
+
+    return {'project': plan['project'], 'services': results, 'removed': removed, 'orphans': kept}
@@ -0,0 +1,87 @@
+from datetime import datetime, timezone
+
+from extensions import db, jobs
+from models import ComposeProject
+from services.compose import run_compose_deploy
+from services.jobs import JobCancelled
+
+
+def save_project(plan, compose_file):
+    """Store the latest compose file and plan of a project, creating it if new."""
+    project = ComposeProject.query.filter_by(name=plan['project']).first()
+    if project is None:
+        project = ComposeProject(name=plan['project'])
+        db.session.add(project)
+    project.compose_file = compose_file
+    project.plan = plan
+    project.status = 'pending'
+    project.last_error = None
+    project.updated_at = datetime.now(timezone.utc)
+    db.session.commit()
+    return project
+
+
+def mark_queued(project, job_id):
+    # Committed before the job is started, so the job's own status updates
+    # always come after this one.
+    project.status = 'queued'
+    project.last_job_id = job_id
+    db.session.commit()
+
+
+def run_project_deploy(job, docker_manager, pull_manager, name, max_workers, remove_orphans=()):
+    """Deploy the stored plan of a project and record the outcome.
+
+    The service hashes are only updated after a successful deploy, so they
+    always describe what is actually running.
+    """
+    project = ComposeProject.query.filter_by(name=name).first()
+    if project is None:
+        raise ValueError(f"Compose project {name} not found")
+    plan = project.plan
+    project.status = 'deploying'
+    db.session.commit()
+
+    try:
+        result = run_compose_deploy(job, docker_manager, pull_manager, plan, max_workers, remove_orphans)
+    except JobCancelled:
+        project.status = 'cancelled'
+        db.session.commit()
+        raise
+    except Exception as e:
+        project.status = 'failed'
+        project.last_error = str(e)
+        db.session.commit()
+        raise
+
+    project.status = 'deployed'
+    project.service_hashes = plan['hashes']
+    project.deployed_at = datetime.now(timezone.utc)
+    db.session.commit()
+    return result
+
+
+def project_status(project):
+    # A job cancelled before it started, or lost to a restart, never gets to
+    # record its outcome.
+    if project.status in ('queued', 'deploying'):
+        job = jobs.get(project.last_job_id) if project.last_job_id else None
+        if job is None:
+            return 'interrupted'
+        if job.status == 'cancelled':
+            return 'cancelled'
+    return project.status
+
+
+def project_to_dict(project):
+    return {
+        'name': project.name,
+        'status': project_status(project),
+        'services': sorted(project.plan['services']),
+        'service_hashes': project.service_hashes or {},
+        'last_job_id': project.last_job_id,
+        'last_error': project.last_error,
+        'created_at': project.created_at.isoformat() if project.created_at else None,
+        'updated_at': project.updated_at.isoformat() if project.updated_at else None,
+        'deployed_at': project.deployed_at.isoformat() if project.deployed_at else None,
+    }
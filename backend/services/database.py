@@ -0,0 +1,64 @@
+from sqlalchemy import event
+
+SQLITE_JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SQLITE_SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+
+def sqlite_pragmas(journal_mode='WAL', synchronous='NORMAL', busy_timeout=5000):
+    journal_mode = journal_mode.upper()
+    synchronous = synchronous.upper()
+    if journal_mode not in SQLITE_JOURNAL_MODES:
+        raise ValueError(f"Invalid SQLite journal mode {journal_mode}")
+    if synchronous not in SQLITE_SYNCHRONOUS_MODES:
+        raise ValueError(f"Invalid SQLite synchronous mode {synchronous}")
+    return (
+        f"PRAGMA journal_mode={journal_mode}",
+        f"PRAGMA synchronous={synchronous}",
+        f"PRAGMA busy_timeout={int(busy_timeout)}",
+    )
+
+
+def tune_sqlite_engine(engine, pragmas):
+    """Apply the given PRAGMAs to every new connection of a SQLite engine.
+
+    WAL lets readers proceed while a write is in progress, NORMAL sync only
+    fsyncs at checkpoints (safe under WAL), and the busy timeout makes a
+    writer wait for the lock instead of failing with "database is locked".
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def init_database(app, db):
+    pragmas = sqlite_pragmas(
+        app.config['SQLITE_JOURNAL_MODE'],
+        app.config['SQLITE_SYNCHRONOUS'],
+        app.config['SQLITE_BUSY_TIMEOUT']
+    )
+    with app.app_context():
+        tune_sqlite_engine(db.engine, pragmas)
+
+
+def schema_version(db):
+    """The PRAGMA user_version of a SQLite database, or None for other backends."""
+    if db.engine.dialect.name != 'sqlite':
+        return None
+    with db.engine.connect() as connection:
+        return connection.exec_driver_sql('PRAGMA user_version').scalar()
+
+
+def set_schema_version(db, version):
+    if db.engine.dialect.name != 'sqlite':
+        return
+    with db.engine.connect() as connection:
+        connection.exec_driver_sql(f'PRAGMA user_version={int(version)}')
+        connection.commit()
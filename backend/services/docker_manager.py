@@ -0,0 +1,98 @@
+import threading
+import time
+
+import docker
+
+
+class DockerManager:
+    """App-scoped Docker client shared by every blueprint.
+
+    One DockerClient (and therefore one HTTP connection pool to the daemon)
+    is created lazily, sized to the number of server threads, and reused for
+    the lifetime of the process. The daemon is pinged at most once per
+    health interval; if the ping fails the client is rebuilt so a daemon
+    restart does not leave every request failing on stale sockets.
+    """
+
+    def __init__(self, app=None):
+        self._client = None
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self.timeout = 30
+        self.pool_size = 4
+        self.health_interval = 10
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.timeout = app.config.get('DOCKER_TIMEOUT', self.timeout)
+        self.pool_size = app.config.get('DOCKER_POOL_SIZE', self.pool_size)
+        self.health_interval = app.config.get('DOCKER_HEALTH_INTERVAL', self.health_interval)
+        app.extensions['docker_manager'] = self
+
+    def get_client(self):
+        client = self._client
+        if client is not None and time.monotonic() - self._last_check < self.health_interval:
+            return client
+
+        with self._lock:
+            if self._client is not None and time.monotonic() - self._last_check < self.health_interval:
+                return self._client
+
+            if self._client is not None:
+                try:
+                    self._client.ping()
+                    self._last_check = time.monotonic()
+                    return self._client
+                except Exception:
+                    self._close()
+
+            self._client = self._connect()
+            self._last_check = time.monotonic()
+            return self._client
+
+    def create_stream_client(self):
+        # Long-lived streams (events, logs, stats) get their own connection so
+        # they never hold on to a slot of the shared request pool, and no read
+        # timeout since a quiet stream is not a dead one.
+        try:
+            return docker.from_env(timeout=None, max_pool_size=1)
+        except docker.errors.DockerException as e:
+            raise RuntimeError(f"Failed to connect to Docker daemon: {str(e)}")
+
+    def create_batch_client(self, pool_size):
+        # Fan-out operations get a pool as wide as their worker count instead
+        # of contending with request threads for the shared one.
+        try:
+            return docker.from_env(timeout=self.timeout, max_pool_size=pool_size)
+        except docker.errors.DockerException as e:
+            raise RuntimeError(f"Failed to connect to Docker daemon: {str(e)}")
+
+    def invalidate(self):
+        with self._lock:
+            self._close()
+
+    def close(self):
+        self.invalidate()
+
+    def _connect(self):
+        try:
+            client = docker.from_env(timeout=self.timeout, max_pool_size=self.pool_size)
+        except docker.errors.DockerException as e:
+            raise RuntimeError(f"Failed to connect to Docker daemon: {str(e)}")
+
+        try:
+            client.ping()
+        except Exception as e:
+            client.close()
+            raise RuntimeError(f"Failed to connect to Docker daemon: {str(e)}")
+        return client
+
+    def _close(self):
+        if self._client is not None:
+            try:
+                self._client.close()
+            except Exception:
+                pass
+        self._client = None
+        self._last_check = 0.0
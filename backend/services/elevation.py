@@ -0,0 +1,59 @@
+import threading
+import time
+
+
+class ElevationCache:
+    """Short-lived "sudo" grants for destructive operations.
+
+    After a user confirms their password once, further destructive calls
+    made with the same access token (identified by its jti) skip the
+    password check until the grant expires, so a cleanup of many resources
+    pays for one password hash instead of one per call.
+    """
+
+    def __init__(self, app=None):
+        self._grants = {}
+        self._lock = threading.Lock()
+        self.ttl = 300
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('ELEVATION_TTL', self.ttl)
+        app.extensions['elevation'] = self
+
+    def grant(self, jti, username):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._prune()
+            self._grants[jti] = (username, expires_at)
+        return expires_at
+
+    def is_elevated(self, jti, username):
+        with self._lock:
+            grant = self._grants.get(jti)
+            if grant is None:
+                return False
+            if grant[1] <= time.time():
+                del self._grants[jti]
+                return False
+            return grant[0] == username
+
+    def expires_at(self, jti):
+        with self._lock:
+            grant = self._grants.get(jti)
+            return grant[1] if grant and grant[1] > time.time() else None
+
+    def revoke(self, jti):
+        with self._lock:
+            self._grants.pop(jti, None)
+
+    def revoke_user(self, username):
+        with self._lock:
+            for jti in [jti for jti, grant in self._grants.items() if grant[0] == username]:
+                del self._grants[jti]
+
+    def _prune(self):
+        now = time.time()
+        for jti in [jti for jti, grant in self._grants.items() if grant[1] <= now]:
+            del self._grants[jti]
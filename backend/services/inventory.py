@@ -0,0 +1,366 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import docker
+
+logger = logging.getLogger(__name__)
+
+IGNORED_CONTAINER_ACTIONS = (
+    'exec_', 'attach', 'resize', 'top', 'export', 'commit', 'copy',
+    'archive-path', 'extract-to-dir',
+)
+
+IMAGE_ACTIONS = ('pull', 'tag', 'untag', 'delete', 'import', 'load', 'build')
+
+
+def fetch_image_tags(client):
+    image_tags = {}
+    for image in client.api.images():
+        tags = [tag for tag in (image.get('RepoTags') or []) if tag != '<none>:<none>']
+        image_tags[image['Id']] = tags[0] if tags else "unknown"
+    return image_tags
+
+
+def inspect_networks(client, max_workers=8):
+    # The networks list endpoint omits attached containers, so every network
+    # still needs an inspect; run them on a bounded pool instead of serially.
+    # Keep max_workers within the client's connection pool, or urllib3 opens
+    # (and throws away) extra connections on every call.
+    network_ids = [network['Id'] for network in client.api.networks()]
+
+    def inspect(network_id):
+        try:
+            return client.api.inspect_network(network_id)
+        except docker.errors.NotFound:
+            return None
+
+    if len(network_ids) <= 1:
+        networks = [inspect(network_id) for network_id in network_ids]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(network_ids))) as executor:
+            networks = list(executor.map(inspect, network_ids))
+    return [network for network in networks if network is not None]
+
+
+class Inventory:
+    """In-memory model of the daemon's containers, networks and volumes.
+
+    A background thread performs one full sync and then follows the Docker
+    events stream, refreshing only the object an event refers to. When the
+    stream breaks the model is marked stale and rebuilt from scratch, so a
+    missed event can never leave it permanently wrong. Readers check
+    ``ready`` and fall back to querying the daemon while a sync is pending.
+    """
+
+    def __init__(self, docker_manager, app=None):
+        self._docker_manager = docker_manager
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._events = None
+        self._subscribers = []
+        self._sync_listeners = []
+
+        self._containers = {}
+        self._container_details = {}
+        self._short_ids = {}
+        self._volume_usage = {}
+        self._networks = {}
+        self._network_names = {}
+        self._volumes = {}
+        self._image_tags = {}
+
+        self.enabled = True
+        self.resync_delay = 5
+        self.inspect_workers = 8
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('INVENTORY_ENABLED', self.enabled)
+        self.resync_delay = app.config.get('INVENTORY_RESYNC_DELAY', self.resync_delay)
+        self.inspect_workers = app.config.get('NETWORK_INSPECT_WORKERS', self.inspect_workers)
+        app.extensions['inventory'] = self
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='inventory', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        events = self._events
+        if events is not None:
+            events.close()
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def on_sync(self, callback):
+        """Call callback() after every full sync, before any event is applied.
+
+        Events missed while the stream was down are not replayed to
+        subscribers; this lets them catch up on the gap themselves.
+        """
+        with self._lock:
+            self._sync_listeners.append(callback)
+
+    def containers(self):
+        with self._lock:
+            return list(self._containers.values())
+
+    def get_container(self, container_id):
+        with self._lock:
+            full_id = self._resolve_container_id(container_id)
+            return self._containers.get(full_id) if full_id else None
+
+    def get_container_details(self, container_id):
+        with self._lock:
+            full_id = self._resolve_container_id(container_id)
+            if not full_id:
+                return None
+            details = self._container_details.get(full_id)
+            summary = self._containers[full_id]
+        if details is not None:
+            return details
+
+        client = self._docker_manager.get_client()
+        try:
+            details = client.api.inspect_container(full_id)
+        except docker.errors.NotFound:
+            return None
+        with self._lock:
+            # Only cache if no event replaced the container while inspecting.
+            if self._containers.get(full_id) is summary:
+                self._container_details[full_id] = details
+        return details
+
+    def networks(self):
+        with self._lock:
+            return list(self._networks.values())
+
+    def get_network(self, network_id):
+        with self._lock:
+            if network_id in self._networks:
+                return self._networks[network_id]
+            if network_id in self._network_names:
+                return self._networks.get(self._network_names[network_id])
+            for full_id, network in self._networks.items():
+                if full_id.startswith(network_id):
+                    return network
+            return None
+
+    def volumes(self):
+        with self._lock:
+            return list(self._volumes.values())
+
+    def get_volume(self, volume_name):
+        with self._lock:
+            return self._volumes.get(volume_name)
+
+    def volume_mounts(self, volume_name):
+        with self._lock:
+            usage = self._volume_usage.get(volume_name, {})
+            return [
+                (self._containers[container_id], mount)
+                for container_id, mounts in usage.items()
+                for mount in mounts
+            ]
+
+    def volume_usage_counts(self):
+        with self._lock:
+            return {
+                volume_name: sum(len(mounts) for mounts in usage.values())
+                for volume_name, usage in self._volume_usage.items()
+            }
+
+    def image_tags(self):
+        with self._lock:
+            return dict(self._image_tags)
+
+    def counts(self):
+        with self._lock:
+            return {
+                'container_count': len(self._containers),
+                'network_count': len(self._networks),
+                'volume_count': len(self._volumes),
+            }
+
+    def _resolve_container_id(self, container_id):
+        if container_id in self._containers:
+            return container_id
+        if container_id in self._short_ids:
+            return self._short_ids[container_id]
+        for full_id in self._containers:
+            if full_id.startswith(container_id):
+                return full_id
+        return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            stream_client = None
+            try:
+                client = self._docker_manager.get_client()
+                stream_client = self._docker_manager.create_stream_client()
+                # Subscribe before syncing so nothing that happens during the
+                # sync is lost; replayed events are harmless refreshes.
+                self._events = stream_client.api.events(since=int(time.time()), decode=True)
+                self._full_sync(client)
+                self._ready.set()
+                self._notify_sync()
+                for event in self._events:
+                    if self._stop.is_set():
+                        break
+                    self._apply_event(client, event)
+            except Exception as e:
+                logger.warning(f"Inventory event stream interrupted: {str(e)}")
+            finally:
+                self._ready.clear()
+                self._events = None
+                if stream_client is not None:
+                    stream_client.close()
+            self._stop.wait(self.resync_delay)
+
+    def _full_sync(self, client):
+        containers = client.api.containers(all=True)
+        networks = inspect_networks(client, min(self.inspect_workers, self._docker_manager.pool_size))
+        volumes = client.api.volumes().get('Volumes') or []
+        image_tags = fetch_image_tags(client)
+
+        with self._lock:
+            self._containers = {container['Id']: container for container in containers}
+            self._short_ids = {container_id[:12]: container_id for container_id in self._containers}
+            self._container_details = {}
+            self._volume_usage = {}
+            for container in containers:
+                self._index_mounts(container)
+            self._networks = {network['Id']: network for network in networks}
+            self._network_names = {network['Name']: network['Id'] for network in networks}
+            self._volumes = {volume['Name']: volume for volume in volumes}
+            self._image_tags = image_tags
+
+    def _apply_event(self, client, event):
+        event_type = event.get('Type')
+        action = event.get('Action', '')
+        actor = event.get('Actor', {})
+        attributes = actor.get('Attributes', {})
+
+        try:
+            if event_type == 'container' and not action.startswith(IGNORED_CONTAINER_ACTIONS):
+                self._refresh_container(client, actor.get('ID'), removed=action == 'destroy')
+            elif event_type == 'network':
+                self._refresh_network(client, actor.get('ID'), removed=action == 'destroy')
+                if attributes.get('container'):
+                    self._refresh_container(client, attributes['container'])
+            elif event_type == 'volume' and action in ('create', 'destroy'):
+                self._refresh_volume(client, actor.get('ID'), removed=action == 'destroy')
+            elif event_type == 'volume' and attributes.get('container'):
+                self._refresh_container(client, attributes['container'])
+            elif event_type == 'image' and action in IMAGE_ACTIONS:
+                image_tags = fetch_image_tags(client)
+                with self._lock:
+                    self._image_tags = image_tags
+        except Exception as e:
+            logger.warning(f"Failed to apply {event_type} {action} event: {str(e)}")
+
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning(f"Inventory subscriber failed: {str(e)}")
+
+    def _notify_sync(self):
+        with self._lock:
+            listeners = list(self._sync_listeners)
+        for callback in listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Inventory sync listener failed: {str(e)}")
+
+    def _refresh_container(self, client, container_id, removed=False):
+        if not container_id:
+            return
+        container = None
+        if not removed:
+            matches = client.api.containers(all=True, filters={'id': container_id})
+            container = matches[0] if matches else None
+
+        with self._lock:
+            self._container_details.pop(container_id, None)
+            previous = self._containers.pop(container_id, None)
+            if previous is not None:
+                self._unindex_mounts(previous)
+            if container is None:
+                self._short_ids.pop(container_id[:12], None)
+            else:
+                self._containers[container_id] = container
+                self._short_ids[container_id[:12]] = container_id
+                self._index_mounts(container)
+
+    def _index_mounts(self, container):
+        for mount in container.get('Mounts') or []:
+            if mount.get('Type') == 'volume' and mount.get('Name'):
+                self._volume_usage.setdefault(mount['Name'], {}) \
+                    .setdefault(container['Id'], []).append(mount)
+
+    def _unindex_mounts(self, container):
+        for mount in container.get('Mounts') or []:
+            volume_name = mount.get('Name')
+            usage = self._volume_usage.get(volume_name)
+            if usage is None:
+                continue
+            usage.pop(container['Id'], None)
+            if not usage:
+                del self._volume_usage[volume_name]
+
+    def _refresh_network(self, client, network_id, removed=False):
+        if not network_id:
+            return
+        network = None
+        if not removed:
+            try:
+                network = client.api.inspect_network(network_id)
+            except docker.errors.NotFound:
+                network = None
+
+        with self._lock:
+            previous = self._networks.pop(network_id, None)
+            if previous is not None:
+                self._network_names.pop(previous['Name'], None)
+            if network is not None:
+                self._networks[network_id] = network
+                self._network_names[network['Name']] = network_id
+
+    def _refresh_volume(self, client, volume_name, removed=False):
+        if not volume_name:
+            return
+        volume = None
+        if not removed:
+            try:
+                volume = client.api.inspect_volume(volume_name)
+            except docker.errors.NotFound:
+                volume = None
+
+        with self._lock:
+            if volume is None:
+                self._volumes.pop(volume_name, None)
+            else:
+                self._volumes[volume_name] = volume
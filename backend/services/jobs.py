@@ -0,0 +1,237 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kind, max_log_lines):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.future = None
+        self._logs = deque(maxlen=max_log_lines)
+        self._log_seq = 0
+        self._cancel = threading.Event()
+        self._cancel_callbacks = []
+        self._listeners = []
+        self._changed = threading.Condition()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def on_cancel(self, callback):
+        """Run callback() when the job is cancelled, or now if it already was.
+
+        For work that blocks without reaching a check_cancelled(), such as a
+        read from a quiet stream: the callback should make that call fail.
+        """
+        with self._changed:
+            if not self._cancel.is_set():
+                self._cancel_callbacks.append(callback)
+                return
+        callback()
+
+    def request_cancel(self):
+        with self._changed:
+            self._cancel.set()
+            callbacks, self._cancel_callbacks = self._cancel_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Cancel callback of job {self.id} failed: {str(e)}")
+
+    def add_listener(self, callback):
+        """Call callback() from the job's thread whenever it logs or changes status.
+
+        For readers that cannot block in logs_after(), such as an event loop;
+        the callback must be quick and should only schedule the actual read.
+        """
+        with self._changed:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._changed:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def log(self, line):
+        with self._changed:
+            self._log_seq += 1
+            self._logs.append((self._log_seq, line))
+            self._changed.notify_all()
+            listeners = list(self._listeners)
+        self._notify(listeners)
+
+    def set_status(self, status, result=None, error=None):
+        with self._changed:
+            self.status = status
+            if status == 'running':
+                self.started_at = time.time()
+            if status in FINISHED_STATUSES:
+                self.finished_at = time.time()
+            if result is not None:
+                self.result = result
+            if error is not None:
+                self.error = error
+            self._changed.notify_all()
+            listeners = list(self._listeners)
+        self._notify(listeners)
+
+    def _notify(self, listeners):
+        for callback in listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Listener of job {self.id} failed: {str(e)}")
+
+    def logs_after(self, seq=0, timeout=None):
+        """Log lines newer than seq, waiting up to timeout for some to arrive.
+
+        Only the most recent lines are retained, so a slow reader may skip
+        ahead; the returned sequence numbers make that gap visible.
+        """
+        with self._changed:
+            if timeout and self._log_seq <= seq and not self.finished:
+                self._changed.wait(timeout)
+            return [(line_seq, line) for line_seq, line in self._logs if line_seq > seq]
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+class JobQueue:
+    """Runs slow operations (image builds, pulls) off the request threads.
+
+    Jobs are executed by a bounded thread pool, so a burst of slow builds
+    queues up instead of tying up the web server's workers. Kinds listed in
+    dedicated_workers get a pool of their own, so e.g. a quick container
+    create never waits behind running builds. Finished jobs are kept for
+    inspection until JOB_RETENTION newer ones have been submitted.
+    """
+
+    def __init__(self, app=None):
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executors = {}
+        self._app = None
+        self.max_workers = 2
+        self.dedicated_workers = {}
+        self.max_log_lines = 1000
+        self.retention = 100
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_workers = app.config.get('JOB_WORKERS', self.max_workers)
+        self.max_log_lines = app.config.get('JOB_LOG_LINES', self.max_log_lines)
+        self.retention = app.config.get('JOB_RETENTION', self.retention)
+        self.dedicated_workers = {'create': app.config.get('CREATE_JOB_WORKERS', self.max_workers)}
+        self._app = app
+        app.extensions['jobs'] = self
+
+    def submit(self, kind, fn, *args, **kwargs):
+        return self.start(self.create(kind), fn, *args, **kwargs)
+
+    def create(self, kind):
+        """Register a queued job without running it yet.
+
+        Lets a caller record the job id (e.g. in the database) before the job
+        can start and report its outcome.
+        """
+        job = Job(kind, self.max_log_lines)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        return job
+
+    def start(self, job, fn, *args, **kwargs):
+        with self._lock:
+            job.future = self._executor_for(job.kind).submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.request_cancel()
+        if job.future is not None and job.future.cancel():
+            job.set_status('cancelled')
+        else:
+            job.log("Cancellation requested")
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancelled:
+            job.set_status('cancelled')
+            return
+        job.set_status('running')
+        try:
+            if self._app is not None:
+                with self._app.app_context():
+                    result = fn(job, *args, **kwargs)
+            else:
+                result = fn(job, *args, **kwargs)
+            job.set_status('succeeded', result=result)
+        except JobCancelled:
+            job.set_status('cancelled')
+        except Exception as e:
+            logger.warning(f"Job {job.id} ({job.kind}) failed: {str(e)}")
+            job.set_status('failed', error=str(e))
+
+    def _executor_for(self, kind):
+        pool = kind if kind in self.dedicated_workers else None
+        executor = self._executors.get(pool)
+        if executor is None:
+            max_workers = self.dedicated_workers[pool] if pool else self.max_workers
+            executor = self._executors[pool] = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix=f"job-{pool}" if pool else 'job'
+            )
+        return executor
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(len(self._jobs) - self.retention, 0)]:
+            del self._jobs[job_id]
@@ -0,0 +1,121 @@
+from datetime import datetime, timezone
+
+
+def parse_log_timestamp(value):
+    """Parse a Docker RFC3339Nano timestamp into (epoch seconds, nanoseconds)."""
+    if isinstance(value, bytes):
+        value = value.decode('ascii', errors='replace')
+    value = value.rstrip('Z')
+    seconds_part, _, fraction = value.partition('.')
+    moment = datetime.strptime(seconds_part, '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
+    nanos = int((fraction + '000000000')[:9]) if fraction else 0
+    return int(moment.timestamp()), nanos
+
+
+def parse_cursor(cursor):
+    """Split a "<timestamp>:<ordinal>" cursor into its timestamp key and ordinal."""
+    timestamp, _, ordinal = cursor.rpartition(':')
+    if not timestamp or not ordinal.isdigit():
+        raise ValueError("Invalid log cursor")
+    return parse_log_timestamp(timestamp), int(ordinal)
+
+
+class LogLineFramer:
+    """Re-frame a raw log byte stream into timestamped lines.
+
+    Docker hands back arbitrary chunks, so partial lines are carried over to
+    the next chunk, but never more than max_line_bytes of one: an oversized
+    line is emitted in pieces rather than buffered whole. feed() and flush()
+    return (timestamp, message) pairs where timestamp is the raw RFC3339Nano
+    prefix of the line, or None for continuation pieces.
+    """
+
+    def __init__(self, max_line_bytes=65536):
+        self.max_line_bytes = max_line_bytes
+        self._buffer = bytearray()
+        self._continuation = False
+
+    def _split(self, line):
+        if self._continuation:
+            return None, line
+        timestamp, _, message = line.partition(b' ')
+        return timestamp.decode('ascii', errors='replace'), message
+
+    def feed(self, chunk):
+        lines = []
+        buffer = self._buffer
+        buffer.extend(chunk)
+        while True:
+            newline = buffer.find(b'\n')
+            if newline == -1:
+                break
+            line = bytes(buffer[:newline])
+            del buffer[:newline + 1]
+            lines.append(self._split(line))
+            self._continuation = False
+
+        while len(buffer) > self.max_line_bytes:
+            piece = bytes(buffer[:self.max_line_bytes])
+            del buffer[:self.max_line_bytes]
+            lines.append(self._split(piece))
+            self._continuation = True
+        return lines
+
+    def flush(self):
+        if not self._buffer:
+            return []
+        line = self._split(bytes(self._buffer))
+        self._buffer.clear()
+        return [line]
+
+
+def iter_log_lines(chunks, max_line_bytes=65536):
+    framer = LogLineFramer(max_line_bytes)
+    for chunk in chunks:
+        yield from framer.feed(chunk)
+    yield from framer.flush()
+
+
+class LogCursor:
+    """Attach resumable "<timestamp>:<ordinal>" cursors to each log line.
+
+    The ordinal counts lines sharing one timestamp so a client resuming from
+    a cursor skips exactly the lines it has already seen, even when several
+    lines were written within the same nanosecond.
+    """
+
+    def __init__(self, after=None):
+        self.after = after
+        self._last_key = None
+        self._ordinal = 0
+
+    def label(self, timestamp, message):
+        """Return (cursor, timestamp, line), or None for an already seen line."""
+        if timestamp is not None:
+            try:
+                key = parse_log_timestamp(timestamp)
+            except ValueError:
+                key = self._last_key
+            self._ordinal = self._ordinal + 1 if key == self._last_key else 1
+            self._last_key = key
+
+        last_key = self._last_key
+        if self.after is not None and last_key is not None and (last_key, self._ordinal) <= self.after:
+            return None
+
+        cursor = f"{format_cursor_timestamp(last_key)}:{self._ordinal}" if last_key else ''
+        return cursor, timestamp, message.decode('utf-8', errors='replace')
+
+
+def iter_cursored_lines(chunks, after=None, max_line_bytes=65536):
+    cursors = LogCursor(after)
+    for timestamp, message in iter_log_lines(chunks, max_line_bytes):
+        labelled = cursors.label(timestamp, message)
+        if labelled is not None:
+            yield labelled
+
+
+def format_cursor_timestamp(key):
+    seconds, nanos = key
+    moment = datetime.fromtimestamp(seconds, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+    return f"{moment}.{nanos:09d}Z"
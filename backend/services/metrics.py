@@ -0,0 +1,197 @@
+import threading
+import time
+from array import array
+
+ROLLUPS = (
+    ('1m', 60, 1440),
+    ('1h', 3600, 720),
+    ('1d', 86400, 365),
+)
+
+SYSTEM_METRICS = ('system_load', 'cpu_percent', 'memory_percent', 'disk_percent', 'load_average')
+COUNT_METRICS = ('container_count', 'network_count', 'volume_count')
+
+
+class RingBuffer:
+    """Fixed-capacity (timestamp, value) series backed by two float arrays."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._timestamps = array('d', bytes(8 * capacity))
+        self._values = array('d', bytes(8 * capacity))
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, timestamp, value):
+        if self._size < self.capacity:
+            index = (self._start + self._size) % self.capacity
+            self._size += 1
+        else:
+            index = self._start
+            self._start = (self._start + 1) % self.capacity
+        self._timestamps[index] = timestamp
+        self._values[index] = value
+
+    def _at(self, position):
+        index = (self._start + position) % self.capacity
+        return self._timestamps[index], self._values[index]
+
+    def first(self):
+        return self._at(0) if self._size else None
+
+    def last(self):
+        return self._at(self._size - 1) if self._size else None
+
+    def points(self, count=None, since=None):
+        start = 0
+        if since is not None:
+            start = self._bisect(since)
+        if count is not None:
+            start = max(start, self._size - count)
+        return [self._at(position) for position in range(start, self._size)]
+
+    def value_at(self, timestamp):
+        # Latest value recorded at or before timestamp.
+        position = self._bisect(timestamp + 1e-9) - 1
+        return self._at(position)[1] if position >= 0 else None
+
+    def _bisect(self, timestamp):
+        low, high = 0, self._size
+        while low < high:
+            middle = (low + high) // 2
+            if self._at(middle)[0] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+class Rollup:
+    """Averages raw points into fixed-width buckets kept in a ring buffer."""
+
+    def __init__(self, resolution, capacity):
+        self.resolution = resolution
+        self.buffer = RingBuffer(capacity)
+        self._bucket = None
+        self._sum = 0.0
+        self._count = 0
+
+    def add(self, timestamp, value):
+        bucket = timestamp - (timestamp % self.resolution)
+        if self._bucket is not None and bucket != self._bucket:
+            self.flush()
+        self._bucket = bucket
+        self._sum += value
+        self._count += 1
+
+    def flush(self):
+        if self._count:
+            self.buffer.append(self._bucket, self._sum / self._count)
+        self._sum = 0.0
+        self._count = 0
+
+    def points(self, count=None, since=None):
+        points = self.buffer.points(count=count, since=since)
+        if self._count:
+            points.append((self._bucket, self._sum / self._count))
+            if count is not None:
+                points = points[-count:]
+        return points
+
+
+class MetricSeries:
+    def __init__(self, raw_capacity):
+        self.raw = RingBuffer(raw_capacity)
+        self.rollups = {name: Rollup(resolution, capacity) for name, resolution, capacity in ROLLUPS}
+
+    def record(self, timestamp, value):
+        self.raw.append(timestamp, value)
+        for rollup in self.rollups.values():
+            rollup.add(timestamp, value)
+
+    def points(self, resolution='raw', count=None, since=None):
+        if resolution == 'raw':
+            return self.raw.points(count=count, since=since)
+        return self.rollups[resolution].points(count=count, since=since)
+
+    def value_at(self, timestamp):
+        value = self.raw.value_at(timestamp)
+        if value is not None:
+            return value
+        # Older than the raw window: use the finest rollup that reaches back.
+        for rollup in self.rollups.values():
+            value = rollup.buffer.value_at(timestamp)
+            if value is not None:
+                return value
+        return None
+
+    def oldest(self):
+        candidates = [self.raw.first()]
+        candidates += [rollup.buffer.first() for rollup in self.rollups.values()]
+        candidates = [point for point in candidates if point is not None]
+        return min(candidates)[1] if candidates else None
+
+
+class MetricsStore:
+    """In-process time-series store for dashboard metrics.
+
+    Each metric keeps a raw ring buffer at the sampler's resolution plus
+    1m/1h/1d averaged rollups, all in preallocated float arrays, so memory is
+    fixed no matter how long the process runs. Values are fed from the
+    system sampler and the inventory rather than from request handlers.
+    """
+
+    def __init__(self, system_sampler, inventory, app=None):
+        self._system_sampler = system_sampler
+        self._inventory = inventory
+        self._series = {}
+        self._lock = threading.Lock()
+        self.raw_capacity = 720
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.raw_capacity = app.config.get('METRICS_RAW_CAPACITY', self.raw_capacity)
+        app.extensions['metrics'] = self
+        self._system_sampler.add_listener(self._on_sample)
+
+    def metrics(self):
+        with self._lock:
+            return sorted(self._series)
+
+    def resolutions(self):
+        return ['raw'] + [name for name, _, _ in ROLLUPS]
+
+    def record(self, name, value, timestamp=None):
+        timestamp = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                series = self._series[name] = MetricSeries(self.raw_capacity)
+            series.record(timestamp, float(value))
+
+    def points(self, name, resolution='raw', count=None, since=None):
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                return []
+            return series.points(resolution, count=count, since=since)
+
+    def value_ago(self, name, seconds):
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                return None
+            value = series.value_at(time.time() - seconds)
+            return value if value is not None else series.oldest()
+
+    def _on_sample(self, sample):
+        timestamp = sample['timestamp']
+        for name in SYSTEM_METRICS:
+            self.record(name, sample[name], timestamp)
+        if self._inventory.ready:
+            for name, value in self._inventory.counts().items():
+                self.record(name, value, timestamp)
@@ -0,0 +1,186 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import docker
+from docker.utils import parse_repository_tag
+
+logger = logging.getLogger(__name__)
+
+PULL_POLICIES = ('always', 'if-not-present', 'never')
+
+
+class PullOperation:
+    def __init__(self, reference):
+        self.reference = reference
+        self.status = 'pulling'
+        self.error = None
+        self.started_at = time.time()
+        self.layers = {}
+        self._progress_marks = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def add_listener(self, callback):
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def update(self, chunk):
+        layer_id = chunk.get('id')
+        status = chunk.get('status', '')
+        detail = chunk.get('progressDetail') or {}
+        line = None
+
+        with self._lock:
+            if layer_id and status:
+                layer = self.layers.setdefault(layer_id, {})
+                changed = layer.get('status') != status
+                layer['status'] = status
+                layer['current'] = detail.get('current', layer.get('current'))
+                layer['total'] = detail.get('total', layer.get('total'))
+
+                # Progress frames arrive many times a second; only surface a
+                # status change or each further 10% of a layer.
+                mark = None
+                if layer.get('total'):
+                    mark = int((layer.get('current') or 0) * 10 / layer['total'])
+                if changed or mark != self._progress_marks.get(layer_id):
+                    self._progress_marks[layer_id] = mark
+                    line = f"{layer_id}: {status} {chunk.get('progress', '')}".rstrip()
+            elif status:
+                line = status
+            listeners = list(self._listeners)
+
+        if line:
+            for callback in listeners:
+                callback(line)
+
+    def finish(self, error=None):
+        with self._lock:
+            self.status = 'failed' if error else 'done'
+            self.error = error
+            listeners = list(self._listeners)
+        message = f"Pull failed: {error}" if error else f"Pulled {self.reference}"
+        for callback in listeners:
+            callback(message)
+        self._done.set()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'reference': self.reference,
+                'status': self.status,
+                'error': self.error,
+                'started_at': self.started_at,
+                'layers': {layer_id: dict(layer) for layer_id, layer in self.layers.items()},
+            }
+
+
+class PullManager:
+    """Coalesces image pulls and runs them in the background.
+
+    Concurrent requests for the same reference share one in-flight pull, and
+    each interested party can listen to its layer progress. Pulls run on a
+    bounded pool over dedicated connections, since they can sit silent for a
+    long time while large layers are extracted.
+    """
+
+    def __init__(self, docker_manager, app=None):
+        self._docker_manager = docker_manager
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self.max_workers = 4
+        self.default_policy = 'if-not-present'
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_workers = app.config.get('PULL_WORKERS', self.max_workers)
+        self.default_policy = app.config.get('DEFAULT_PULL_POLICY', self.default_policy)
+        app.extensions['pull_manager'] = self
+
+    def image_present(self, reference):
+        try:
+            self._docker_manager.get_client().api.inspect_image(reference)
+            return True
+        except docker.errors.ImageNotFound:
+            return False
+
+    def pull(self, reference):
+        with self._lock:
+            operation = self._inflight.get(reference)
+            if operation is not None:
+                return operation
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='pull')
+            operation = self._inflight[reference] = PullOperation(reference)
+            self._executor.submit(self._run, operation)
+            return operation
+
+    def inflight(self):
+        with self._lock:
+            return list(self._inflight.values())
+
+    def _run(self, operation):
+        client = None
+        error = None
+        try:
+            client = self._docker_manager.create_stream_client()
+            repository, tag = parse_repository_tag(operation.reference)
+            for chunk in client.api.pull(repository, tag=tag or 'latest', stream=True, decode=True):
+                if 'error' in chunk:
+                    error = chunk['error'].strip()
+                    break
+                operation.update(chunk)
+        except Exception as e:
+            error = str(e)
+        finally:
+            if error:
+                logger.warning(f"Pull of {operation.reference} failed: {error}")
+            with self._lock:
+                if self._inflight.get(operation.reference) is operation:
+                    del self._inflight[operation.reference]
+            if client is not None:
+                client.close()
+            operation.finish(error)
+
+
+def wait_for_pull(job, pull_manager, image_name):
+    """Pull image_name through the shared pull manager, logging progress to job."""
+    operation = pull_manager.pull(image_name)
+    job.log(f"Pulling {image_name}")
+    operation.add_listener(job.log)
+    try:
+        # The pull may be shared with other requests, so a cancelled job
+        # stops waiting for it rather than aborting it.
+        while not operation.wait(1):
+            job.check_cancelled()
+    finally:
+        operation.remove_listener(job.log)
+
+    if operation.error:
+        raise RuntimeError(f"Error pulling image {image_name}: {operation.error}")
+
+
+def run_pull_and_create(job, pull_manager, docker_manager, image_name, create_kwargs):
+    wait_for_pull(job, pull_manager, image_name)
+
+    job.check_cancelled()
+    container = docker_manager.get_client().containers.create(image=image_name, **create_kwargs)
+    job.log(f"Created container {container.short_id}")
+    return {"container_id": container.id}
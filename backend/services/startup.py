@@ -0,0 +1,41 @@
+import time
+from contextlib import contextmanager
+
+
+class StartupReport:
+    """Wall-clock timings of the phases of create_app, for diagnosing slow boots.
+
+    imported_seconds is how long importing the app module took before
+    create_app ran; it covers the framework, models and extensions imports
+    and is included in the total.
+    """
+
+    def __init__(self, imported_seconds=0.0):
+        self.started_at = time.time()
+        self._started = time.perf_counter() - imported_seconds
+        self.total_seconds = None
+        self.phases = []
+        if imported_seconds:
+            self.phases.append({'name': 'import app module', 'seconds': round(imported_seconds, 6)})
+
+    @contextmanager
+    def measure(self, name, **details):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append({
+                'name': name,
+                'seconds': round(time.perf_counter() - started, 6),
+                **details,
+            })
+
+    def finish(self):
+        self.total_seconds = round(time.perf_counter() - self._started, 6)
+
+    def to_dict(self):
+        return {
+            'started_at': self.started_at,
+            'total_seconds': self.total_seconds,
+            'phases': list(self.phases),
+        }
@@ -0,0 +1,341 @@
+import heapq
+import logging
+import queue
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+TABLE_FIELDS = (
+    'timestamp', 'cpu_percent', 'memory_usage', 'memory_limit', 'memory_percent',
+    'net_rx_rate', 'net_tx_rate', 'block_read_rate', 'block_write_rate', 'pids',
+)
+
+
+class StatsCapacityError(Exception):
+    pass
+
+
+def _network_totals(raw):
+    rx_bytes = tx_bytes = 0
+    for interface in (raw.get('networks') or {}).values():
+        rx_bytes += interface.get('rx_bytes', 0)
+        tx_bytes += interface.get('tx_bytes', 0)
+    return rx_bytes, tx_bytes
+
+
+def _block_totals(raw):
+    read_bytes = write_bytes = 0
+    entries = (raw.get('blkio_stats') or {}).get('io_service_bytes_recursive') or []
+    for entry in entries:
+        operation = entry.get('op', '').lower()
+        if operation == 'read':
+            read_bytes += entry.get('value', 0)
+        elif operation == 'write':
+            write_bytes += entry.get('value', 0)
+    return read_bytes, write_bytes
+
+
+def compute_stats(raw, previous=None):
+    """Turn one raw stats frame into percentages and per-second IO rates.
+
+    CPU usage comes from the cpu/precpu pair inside the frame itself; network
+    and block IO rates need the previous computed sample for the byte deltas.
+    """
+    cpu_stats = raw.get('cpu_stats') or {}
+    precpu_stats = raw.get('precpu_stats') or {}
+    cpu_delta = (cpu_stats.get('cpu_usage') or {}).get('total_usage', 0) \
+        - (precpu_stats.get('cpu_usage') or {}).get('total_usage', 0)
+    system_delta = cpu_stats.get('system_cpu_usage', 0) - precpu_stats.get('system_cpu_usage', 0)
+    online_cpus = cpu_stats.get('online_cpus') \
+        or len((cpu_stats.get('cpu_usage') or {}).get('percpu_usage') or []) or 1
+    cpu_percent = (cpu_delta / system_delta) * online_cpus * 100 if cpu_delta > 0 and system_delta > 0 else 0.0
+
+    memory_stats = raw.get('memory_stats') or {}
+    memory_detail = memory_stats.get('stats') or {}
+    # Page cache is reclaimable; report usage the same way `docker stats` does.
+    memory_cache = memory_detail.get('inactive_file', memory_detail.get('total_inactive_file', memory_detail.get('cache', 0)))
+    memory_usage = max(memory_stats.get('usage', 0) - memory_cache, 0)
+    memory_limit = memory_stats.get('limit', 0)
+    memory_percent = memory_usage / memory_limit * 100 if memory_limit else 0.0
+
+    net_rx_bytes, net_tx_bytes = _network_totals(raw)
+    block_read_bytes, block_write_bytes = _block_totals(raw)
+    now = time.monotonic()
+
+    sample = {
+        'timestamp': time.time(),
+        'monotonic': now,
+        'cpu_percent': round(cpu_percent, 2),
+        'online_cpus': online_cpus,
+        'memory_usage': memory_usage,
+        'memory_limit': memory_limit,
+        'memory_percent': round(memory_percent, 2),
+        'net_rx_bytes': net_rx_bytes,
+        'net_tx_bytes': net_tx_bytes,
+        'block_read_bytes': block_read_bytes,
+        'block_write_bytes': block_write_bytes,
+        'net_rx_rate': 0.0,
+        'net_tx_rate': 0.0,
+        'block_read_rate': 0.0,
+        'block_write_rate': 0.0,
+        'pids': (raw.get('pids_stats') or {}).get('current', 0),
+    }
+
+    if previous is not None:
+        elapsed = now - previous['monotonic']
+        if elapsed > 0:
+            for total, rate in (
+                ('net_rx_bytes', 'net_rx_rate'),
+                ('net_tx_bytes', 'net_tx_rate'),
+                ('block_read_bytes', 'block_read_rate'),
+                ('block_write_bytes', 'block_write_rate'),
+            ):
+                sample[rate] = round(max(sample[total] - previous[total], 0) / elapsed, 1)
+    return sample
+
+
+def public_sample(container_id, sample):
+    return {'container_id': container_id, **{key: value for key, value in sample.items() if key != 'monotonic'}}
+
+
+class StatsTable:
+    """Latest sample per container, stored column-wise in float arrays.
+
+    Containers are mapped to reusable row slots so a fleet snapshot or top-N
+    query walks a few contiguous arrays instead of hundreds of dicts.
+    """
+
+    def __init__(self, capacity=64):
+        self._capacity = capacity
+        self._columns = {field: array('d', bytes(8 * capacity)) for field in TABLE_FIELDS}
+        self._slots = {}
+        self._free = list(range(capacity - 1, -1, -1))
+
+    def __len__(self):
+        return len(self._slots)
+
+    def update(self, container_id, sample):
+        slot = self._slots.get(container_id)
+        if slot is None:
+            if not self._free:
+                self._grow()
+            slot = self._slots[container_id] = self._free.pop()
+        for field in TABLE_FIELDS:
+            self._columns[field][slot] = sample[field]
+
+    def remove(self, container_id):
+        slot = self._slots.pop(container_id, None)
+        if slot is not None:
+            self._free.append(slot)
+
+    def row(self, container_id):
+        slot = self._slots.get(container_id)
+        if slot is None:
+            return None
+        return self._row(container_id, slot)
+
+    def rows(self, sort=None, limit=None):
+        if sort is None:
+            items = self._slots.items()
+            if limit is not None:
+                items = list(items)[:limit]
+        else:
+            column = self._columns[sort]
+            items = heapq.nlargest(limit or len(self._slots), self._slots.items(), key=lambda item: column[item[1]])
+        return [self._row(container_id, slot) for container_id, slot in items]
+
+    def _row(self, container_id, slot):
+        return {'container_id': container_id, **{field: self._columns[field][slot] for field in TABLE_FIELDS}}
+
+    def _grow(self):
+        extra = self._capacity
+        for column in self._columns.values():
+            column.extend(array('d', bytes(8 * extra)))
+        self._free.extend(range(self._capacity + extra - 1, self._capacity - 1, -1))
+        self._capacity += extra
+
+
+class StatsStream:
+    def __init__(self, container_id):
+        self.container_id = container_id
+        self.latest = None
+        self.subscribers = set()
+        self.idle_since = time.monotonic()
+
+
+class StatsHub:
+    """One daemon stats subscription per container, fanned out to viewers.
+
+    The first viewer of a container starts a stream on the worker pool; any
+    further viewers just attach a bounded queue to it. Each stream keeps only
+    its latest computed sample, and shuts itself down once it has had no
+    viewers for the idle timeout. Fleet tracking keeps a stream open for every
+    running container for as long as the fleet snapshot keeps being polled.
+
+    At most max_streams streams run at once. Fleet tracking leaves
+    viewer_reserve of them free, and a viewer that finds every slot taken
+    evicts a stream nobody is watching; if all are watched it is refused.
+    """
+
+    def __init__(self, docker_manager, app=None):
+        self._docker_manager = docker_manager
+        self._streams = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._table = StatsTable()
+        self._fleet_ids = set()
+        self._fleet_until = 0.0
+        self.max_streams = 64
+        self.viewer_reserve = 8
+        self.idle_timeout = 10
+        self.fleet_idle_timeout = 30
+        self.subscriber_queue_size = 10
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_streams = app.config.get('STATS_MAX_STREAMS', self.max_streams)
+        self.viewer_reserve = min(app.config.get('STATS_VIEWER_RESERVED_STREAMS', self.viewer_reserve), self.max_streams)
+        self.idle_timeout = app.config.get('STATS_IDLE_TIMEOUT', self.idle_timeout)
+        self.subscriber_queue_size = app.config.get('STATS_SUBSCRIBER_QUEUE_SIZE', self.subscriber_queue_size)
+        self.fleet_idle_timeout = app.config.get('STATS_FLEET_IDLE_TIMEOUT', self.fleet_idle_timeout)
+        self._table = StatsTable(self.max_streams)
+        app.extensions['stats_hub'] = self
+
+    def track_fleet(self, container_ids):
+        """Keep streams open for the given running containers; returns those left untracked."""
+        with self._lock:
+            self._fleet_until = time.monotonic() + self.fleet_idle_timeout
+            self._fleet_ids = set(container_ids)
+            untracked = []
+            fleet_limit = self.max_streams - self.viewer_reserve
+            for container_id in container_ids:
+                if container_id in self._streams or len(self._streams) < fleet_limit:
+                    self._ensure_stream(container_id)
+                else:
+                    untracked.append(container_id)
+            return untracked
+
+    def sampled_count(self, container_ids):
+        with self._lock:
+            return sum(1 for container_id in container_ids if self._table.row(container_id) is not None)
+
+    def fleet_snapshot(self, container_ids, sort=None, limit=None):
+        with self._lock:
+            if sort is None and limit is None:
+                return [row for row in (self._table.row(container_id) for container_id in container_ids) if row]
+            wanted = set(container_ids)
+            rows = self._table.rows(sort=sort)
+        rows = [row for row in rows if row['container_id'] in wanted]
+        return rows[:limit] if limit else rows
+
+    def subscribe(self, container_id):
+        """Attach a viewer queue to the container's stream.
+
+        Raises StatsCapacityError if a new stream is needed but every slot
+        is taken by a stream that has viewers.
+        """
+        subscriber = queue.Queue(maxsize=self.subscriber_queue_size)
+        with self._lock:
+            if container_id not in self._streams and len(self._streams) >= self.max_streams:
+                self._evict_unwatched()
+            stream = self._ensure_stream(container_id)
+            stream.subscribers.add(subscriber)
+            latest = stream.latest
+        if latest is not None:
+            subscriber.put_nowait(public_sample(container_id, latest))
+        return subscriber
+
+    def unsubscribe(self, container_id, subscriber):
+        with self._lock:
+            stream = self._streams.get(container_id)
+            if stream is None:
+                return
+            stream.subscribers.discard(subscriber)
+            if not stream.subscribers:
+                stream.idle_since = time.monotonic()
+
+    def latest(self, container_id):
+        with self._lock:
+            stream = self._streams.get(container_id)
+            if stream is None or stream.latest is None:
+                return None
+            return public_sample(container_id, stream.latest)
+
+    def _evict_unwatched(self):
+        # Fleet-only and idle streams can be restarted later; prefer the one
+        # that has been unwatched longest. Its thread exits on its next frame.
+        unwatched = [stream for stream in self._streams.values() if not stream.subscribers]
+        if not unwatched:
+            raise StatsCapacityError(f"All {self.max_streams} stats streams are in use")
+        stream = min(unwatched, key=lambda candidate: candidate.idle_since)
+        del self._streams[stream.container_id]
+        self._table.remove(stream.container_id)
+
+    def _ensure_stream(self, container_id):
+        stream = self._streams.get(container_id)
+        if stream is not None:
+            return stream
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_streams, thread_name_prefix='stats')
+        stream = self._streams[container_id] = StatsStream(container_id)
+        self._executor.submit(self._run_stream, stream)
+        return stream
+
+    def _should_stop(self, stream):
+        with self._lock:
+            if self._streams.get(stream.container_id) is not stream:
+                return True
+            if stream.subscribers or time.monotonic() - stream.idle_since < self.idle_timeout:
+                return False
+            if stream.container_id in self._fleet_ids and time.monotonic() < self._fleet_until:
+                return False
+            # Detach under the lock so no new viewer can join a dying stream.
+            if self._streams.get(stream.container_id) is stream:
+                del self._streams[stream.container_id]
+                self._table.remove(stream.container_id)
+            return True
+
+    def _publish(self, stream, sample):
+        with self._lock:
+            stream.latest = sample
+            if sample is not None and self._streams.get(stream.container_id) is stream:
+                self._table.update(stream.container_id, sample)
+            subscribers = list(stream.subscribers)
+        payload = public_sample(stream.container_id, sample) if sample is not None else None
+        for subscriber in subscribers:
+            # Viewers only care about the newest sample; drop the oldest.
+            while True:
+                try:
+                    subscriber.put_nowait(payload)
+                    break
+                except queue.Full:
+                    try:
+                        subscriber.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def _run_stream(self, stream):
+        client = None
+        try:
+            client = self._docker_manager.create_stream_client()
+            previous = None
+            for raw in client.api.stats(stream.container_id, stream=True, decode=True):
+                if self._should_stop(stream):
+                    break
+                previous = compute_stats(raw, previous)
+                self._publish(stream, previous)
+        except Exception as e:
+            logger.warning(f"Stats stream for {stream.container_id} ended: {str(e)}")
+        finally:
+            with self._lock:
+                if self._streams.get(stream.container_id) is stream:
+                    del self._streams[stream.container_id]
+                    self._table.remove(stream.container_id)
+            # Wake any viewers still attached so their responses can finish.
+            self._publish(stream, None)
+            if client is not None:
+                client.close()
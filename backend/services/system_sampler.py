@@ -0,0 +1,123 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_FIELDS = ('cpu_percent', 'memory_percent', 'disk_percent', 'load_average', 'system_load')
+
+
+def calculate_system_load(cpu_percent, memory_percent, disk_percent):
+    system_load = (0.4 * cpu_percent) + (0.3 * memory_percent) + (0.3 * disk_percent)
+    return round(system_load, 1)
+
+
+class SystemSampler:
+    """Collects host CPU, memory, disk and load on a background thread.
+
+    cpu_percent is read without an interval, so each reading covers the time
+    since the previous sample instead of blocking the caller. That baseline
+    is global to psutil, so only the sampler thread ever takes a reading.
+    Samples are kept in a fixed-size ring buffer; readers only ever copy the
+    latest entries.
+    """
+
+    def __init__(self, app=None):
+        self._samples = deque(maxlen=120)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampled = threading.Event()
+        self._thread = None
+        self._listeners = []
+        self.interval = 5
+        self.disk_path = '/'
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.interval = app.config.get('SYSTEM_SAMPLE_INTERVAL', self.interval)
+        self.disk_path = app.config.get('SYSTEM_SAMPLE_DISK_PATH', self.disk_path)
+        self._samples = deque(self._samples, maxlen=app.config.get('SYSTEM_SAMPLE_HISTORY', self._samples.maxlen))
+        app.extensions['system_sampler'] = self
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        # Prime the counter so the first real sample has a baseline.
+        psutil.cpu_percent(interval=None)
+        self._thread = threading.Thread(target=self._run, name='system-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def add_listener(self, callback):
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def latest(self, timeout=2.0):
+        """The newest sample, waiting up to timeout for the first one; else None."""
+        self._sampled.wait(timeout)
+        with self._lock:
+            return self._samples[-1] if self._samples else None
+
+    def history(self, count=None):
+        with self._lock:
+            samples = list(self._samples)
+        return samples[-count:] if count else samples
+
+    def average(self, count):
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        samples = self.history(count)
+        if not samples:
+            return None
+        averaged = {
+            field: round(sum(sample[field] for sample in samples) / len(samples), 1)
+            for field in SAMPLE_FIELDS
+        }
+        averaged['samples'] = len(samples)
+        return averaged
+
+    def sample(self):
+        cpu_percent = psutil.cpu_percent(interval=None)
+        memory_percent = psutil.virtual_memory().percent
+        disk_percent = psutil.disk_usage(self.disk_path).percent
+        try:
+            load_average = os.getloadavg()[0]
+        except (AttributeError, OSError):
+            load_average = 0.0
+
+        return {
+            'timestamp': time.time(),
+            'cpu_percent': cpu_percent,
+            'memory_percent': memory_percent,
+            'disk_percent': disk_percent,
+            'load_average': round(load_average, 2),
+            'system_load': calculate_system_load(cpu_percent, memory_percent, disk_percent),
+        }
+
+    def _run(self):
+        # The first sample comes shortly after start (cpu_percent needs some
+        # time since the priming call), the rest every interval.
+        delay = min(self.interval, 1.0)
+        while not self._stop.wait(delay):
+            delay = self.interval
+            try:
+                sample = self.sample()
+            except Exception as e:
+                logger.warning(f"System sample failed: {str(e)}")
+                continue
+            with self._lock:
+                self._samples.append(sample)
+            self._sampled.set()
+            for callback in self._listeners:
+                try:
+                    callback(sample)
+                except Exception as e:
+                    logger.warning(f"System sample listener failed: {str(e)}")
@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class UserCache:
+    """Recently loaded users, keyed by username, for at most ttl seconds.
+
+    Entries are immutable snapshots rather than ORM objects, so they can be
+    shared across requests and threads without being bound to a session.
+    Anything that changes a user must invalidate its entry after committing.
+
+    Loads run outside the lock, so each invalidation bumps a per-user
+    generation; a load that raced with one is returned but not cached, since
+    it may have read the row from before the change.
+    """
+
+    def __init__(self, app=None):
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.ttl = 30
+        self.max_entries = 256
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+        self.max_entries = app.config.get('USER_CACHE_SIZE', self.max_entries)
+        app.extensions['user_cache'] = self
+
+    def get(self, username, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(username)
+                return entry[0]
+            generation = self._generation(username)
+
+        snapshot = loader(username)
+        if snapshot is not None:
+            with self._lock:
+                if self._generation(username) != generation:
+                    return snapshot
+                self._entries[username] = (snapshot, now + self.ttl)
+                self._entries.move_to_end(username)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, username):
+        with self._lock:
+            self._entries.pop(username, None)
+            self._generations[username] = self._generations.get(username, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
+
+    def _generation(self, username):
+        return self._epoch, self._generations.get(username, 0)
@@ -0,0 +1,112 @@
+import threading
+import time
+
+from services.activity_feed import ActivityFeed
+
+
+def docker_event(timestamp, action, container_id='abc'):
+    return {
+        'Type': 'container',
+        'Action': action,
+        'Actor': {'ID': container_id, 'Attributes': {}},
+        'time': int(timestamp),
+        'timeNano': int(timestamp * 1e9),
+    }
+
+
+class FakeApi:
+    def __init__(self, log):
+        self.log = log
+        self.calls = []
+
+    def events(self, since, until, decode=True):
+        self.calls.append((since, until))
+        return iter([event for event in self.log if since <= event['time'] <= until])
+
+
+class FakeDockerManager:
+    def __init__(self, log):
+        self.client = type('Client', (), {})()
+        self.client.api = FakeApi(log)
+
+    def get_client(self):
+        return self.client
+
+
+class FakeInventory:
+    enabled = True
+
+    def __init__(self):
+        self.ready = True
+        self.subscribers = []
+        self.sync_listeners = []
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def on_sync(self, callback):
+        self.sync_listeners.append(callback)
+
+    def emit(self, event):
+        for callback in self.subscribers:
+            callback(event)
+
+    def resync(self):
+        self.ready = True
+        for callback in self.sync_listeners:
+            callback()
+
+
+def make_feed(log):
+    inventory = FakeInventory()
+    feed = ActivityFeed(FakeDockerManager(log), inventory)
+    feed._inventory.subscribe(feed._on_event)
+    feed._inventory.on_sync(feed.start)
+    return feed, inventory
+
+
+def wait_ready(feed):
+    deadline = time.monotonic() + 2
+    while not feed.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert feed.ready
+
+
+def test_resync_backfills_events_missed_while_stream_was_down():
+    now = time.time()
+    log = [docker_event(now - 60, 'create')]
+    feed, inventory = make_feed(log)
+    feed.start()
+    wait_ready(feed)
+
+    inventory.emit(docker_event(now - 30, 'start'))
+
+    # The stream drops; the feed must not claim to be current meanwhile.
+    inventory.ready = False
+    assert not feed.ready
+    time.sleep(1.1)
+    log.append(docker_event(time.time(), 'die'))
+
+    inventory.resync()
+    wait_ready(feed)
+    assert [event['Action'] for event in feed.recent(limit=10)] == ['create', 'start', 'die']
+
+
+def test_events_during_backfill_are_kept_once():
+    now = time.time()
+    log = [docker_event(now - 5, 'create')]
+    feed, inventory = make_feed(log)
+    release = threading.Event()
+    events = feed._docker_manager.client.api.events
+
+    def slow_events(since, until, decode=True):
+        release.wait(2)
+        return events(since, until, decode)
+
+    feed._docker_manager.client.api.events = slow_events
+    feed.start()
+    inventory.emit(log[0])
+    inventory.emit(docker_event(now, 'start'))
+    release.set()
+    wait_ready(feed)
+    assert [event['Action'] for event in feed.recent(limit=10)] == ['create', 'start']
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip('a2wsgi')
+flask = pytest.importorskip('flask')
+pytest.importorskip('flask_jwt_extended')
+
+from asgi import LoopQueue, OrchestrixASGI, Request  # noqa: E402
+
+
+def make_flask_app(stop):
+    app = flask.Flask(__name__)
+    app.config.update(
+        ASGI_WSGI_WORKERS=4,
+        STATS_IDLE_TIMEOUT=10,
+        STATS_SUBSCRIBER_QUEUE_SIZE=10,
+        STATS_MAX_STREAMS=64,
+        SSE_KEEPALIVE_SECONDS=15,
+        LOG_STREAM_MAX_LINE_BYTES=64 * 1024,
+    )
+
+    @app.route('/events')
+    def events():
+        def generate():
+            yield "data: first\n\n"
+            stop.wait(10)
+        return flask.Response(generate(), mimetype='text/event-stream')
+
+    @app.route('/ping')
+    def ping():
+        return flask.jsonify({"message": "pong"})
+
+    return app
+
+
+def http_scope(path):
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 1234),
+        'server': ('testserver', 80),
+    }
+
+
+async def request(app, path, disconnect=None, first_body=None):
+    messages = []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await (disconnect.wait() if disconnect else asyncio.Event().wait())
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        messages.append(message)
+        if first_body is not None and message['type'] == 'http.response.body' and message.get('body'):
+            first_body.set()
+
+    await app(http_scope(path), receive, send)
+    return messages
+
+
+def test_wsgi_request_completes_while_sse_is_open():
+    stop = threading.Event()
+    app = OrchestrixASGI(make_flask_app(stop))
+
+    async def scenario():
+        streaming = asyncio.Event()
+        disconnect = asyncio.Event()
+        sse = asyncio.ensure_future(request(app, '/events', disconnect, streaming))
+        await asyncio.wait_for(streaming.wait(), timeout=5)
+
+        messages = await asyncio.wait_for(request(app, '/ping'), timeout=5)
+        assert not sse.done()
+
+        stop.set()
+        disconnect.set()
+        await asyncio.wait_for(sse, timeout=5)
+        return messages
+
+    try:
+        messages = asyncio.run(scenario())
+    finally:
+        stop.set()
+    assert messages[0]['status'] == 200
+    assert b'pong' in b''.join(message.get('body', b'') for message in messages[1:])
+
+
+def test_disconnect_closes_stream_while_client_is_slow():
+    stop = threading.Event()
+    app = OrchestrixASGI(make_flask_app(stop))
+
+    async def scenario():
+        closed = asyncio.Event()
+        sending = asyncio.Event()
+        disconnect = asyncio.Event()
+
+        async def source():
+            try:
+                while True:
+                    yield "data: x\n\n"
+            finally:
+                closed.set()
+
+        async def receive():
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.body':
+                sending.set()
+                await asyncio.Event().wait()
+
+        stream = Request(http_scope('/events'), receive, send, {})
+        task = asyncio.ensure_future(app.send_stream(stream, b'text/event-stream', app.with_keepalive(source())))
+        await asyncio.wait_for(sending.wait(), timeout=5)
+        disconnect.set()
+        await asyncio.wait_for(task, timeout=5)
+        return closed.is_set()
+
+    assert asyncio.run(scenario())
+
+
+def test_loop_queue_delivers_from_other_threads():
+    async def scenario():
+        subscriber = LoopQueue(asyncio.get_running_loop(), 10)
+        thread = threading.Thread(target=subscriber.put_nowait, args=({'Action': 'start'},))
+        thread.start()
+        event = await asyncio.wait_for(subscriber.get(), timeout=5)
+        thread.join()
+        return event
+
+    assert asyncio.run(scenario()) == {'Action': 'start'}
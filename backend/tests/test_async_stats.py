@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from services.async_stats import AsyncStatsHub
+from services.stats_hub import StatsCapacityError
+
+
+class QuietClient:
+    def __init__(self):
+        self.closed = []
+
+    async def stats(self, container_id):
+        try:
+            await asyncio.Event().wait()
+            yield {}
+        finally:
+            self.closed.append(container_id)
+
+
+def test_full_hub_evicts_unwatched_stream_or_refuses():
+    client = QuietClient()
+
+    async def scenario():
+        hub = AsyncStatsHub(client, idle_timeout=60, max_streams=2)
+        first = hub.subscribe('a')
+        hub.subscribe('b')
+        await asyncio.sleep(0)
+
+        with pytest.raises(StatsCapacityError):
+            hub.subscribe('c')
+
+        hub.unsubscribe('a', first)
+        hub.subscribe('c')
+        await asyncio.sleep(0)
+        return sorted(hub._streams)
+
+    assert asyncio.run(scenario()) == ['b', 'c']
+    assert client.closed[0] == 'a'
@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip('docker')
+flask = pytest.importorskip('flask')
+pytest.importorskip('flask_sqlalchemy')
+
+from extensions import db  # noqa: E402
+from models import BuildCache  # noqa: E402
+from services import build_cache  # noqa: E402
+
+
+class FakeApi:
+    def inspect_image(self, image_tag):
+        return {'Id': f"sha256:{image_tag}"}
+
+
+class FakeClient:
+    api = FakeApi()
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = flask.Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'cache.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def test_record_survives_concurrent_insert_of_same_digest(app, monkeypatch):
+    update_entry = build_cache._update_entry
+    raced = []
+
+    def racing_update(entry, image_id, image_tag):
+        if not raced:
+            # Another build records the same digest between our lookup and commit.
+            raced.append(True)
+            with db.engine.begin() as connection:
+                connection.execute(BuildCache.__table__.insert().values(
+                    digest='d' * 64, image_id='sha256:other', image_tag=image_tag, hits=3
+                ))
+        update_entry(entry, image_id, image_tag)
+
+    monkeypatch.setattr(build_cache, '_update_entry', racing_update)
+
+    assert build_cache.record(FakeClient(), 'd' * 64, 'local-build-dddd') == 'sha256:local-build-dddd'
+    entries = BuildCache.query.all()
+    assert [(entry.image_id, entry.hits) for entry in entries] == [('sha256:local-build-dddd', 3)]
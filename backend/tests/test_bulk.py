@@ -0,0 +1,44 @@
+import threading
+
+import pytest
+
+pytest.importorskip('docker')
+
+from services.bulk import run_bulk  # noqa: E402
+
+
+class BlockingApi:
+    def __init__(self, release):
+        self.release = release
+
+    def start(self, container_id):
+        self.release.wait(5)
+
+
+class FakeClient:
+    def __init__(self, release):
+        self.api = BlockingApi(release)
+        self.closed = threading.Event()
+
+    def close(self):
+        self.closed.set()
+
+
+class FakeDockerManager:
+    def __init__(self, client):
+        self.client = client
+
+    def create_batch_client(self, workers):
+        return self.client
+
+
+def test_deadline_reports_running_and_unstarted_calls_apart():
+    release = threading.Event()
+    client = FakeClient(release)
+    try:
+        results = run_bulk(FakeDockerManager(client), 'start', ['a', 'b'], 10, 1, 0.1)
+        assert [result['status'] for result in results] == ['timeout', 'skipped']
+        assert not client.closed.is_set()
+    finally:
+        release.set()
+    assert client.closed.wait(5)
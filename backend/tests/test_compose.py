@@ -0,0 +1,127 @@
+import pytest
+
+pytest.importorskip('docker')
+
+from docker.utils import convert_port_bindings  # noqa: E402
+
+from services.compose import (  # noqa: E402
+    _create_service_container, _normalize_port, _normalize_volume, dependency_waves, parse_compose,
+)
+
+COMPOSE = """
+name: Demo
+services:
+  web:
+    image: nginx
+    ports: ["127.0.0.1::80"]
+    depends_on: [api]
+  api:
+    image: api
+    environment:
+      PRICE: "$$5"
+    depends_on: [db]
+  db:
+    image: postgres
+    volumes: ["data:/var/lib/postgresql/data"]
+volumes:
+  data: {}
+"""
+
+
+@pytest.mark.parametrize('port, expected', [
+    ('80', ('80/tcp', '', '')),
+    ('8080:80', ('80/tcp', '', '8080')),
+    ('127.0.0.1:8080:80/udp', ('80/udp', '127.0.0.1', '8080')),
+    ('127.0.0.1::80', ('80/tcp', '127.0.0.1', '')),
+    ('[::1]:8080:80', ('80/tcp', '::1', '8080')),
+    ('[::1]::80', ('80/tcp', '::1', '')),
+    ({'target': 80, 'published': 8080, 'host_ip': '[::1]'}, ('80/tcp', '::1', '8080')),
+])
+def test_normalize_port(port, expected):
+    normalized = _normalize_port(port, 'web')
+    assert (normalized['container'], normalized['host_ip'], normalized['host_port']) == expected
+
+
+@pytest.mark.parametrize('port', ['8000-8010:80', 'http:80', '[::1:8080:80', '[::1]:80', '::1:8080:80', {'published': 80}])
+def test_normalize_port_rejects(port):
+    with pytest.raises(ValueError):
+        _normalize_port(port, 'web')
+
+
+@pytest.mark.parametrize('volume, expected', [
+    ('/cache', {'source': '', 'target': '/cache', 'mode': 'rw'}),
+    ('data:/data', {'source': 'data', 'target': '/data', 'mode': 'rw'}),
+    ('/srv/conf:/etc/app:ro', {'source': '/srv/conf', 'target': '/etc/app', 'mode': 'ro'}),
+    ({'source': 'data', 'target': '/data', 'read_only': True}, {'source': 'data', 'target': '/data', 'mode': 'ro'}),
+])
+def test_normalize_volume(volume, expected):
+    assert _normalize_volume(volume, 'db', {'data'}) == expected
+
+
+@pytest.mark.parametrize('volume', ['./data:/data', '~/data:/data', 'other:/data', 'data:relative', {'source': 'data'}])
+def test_normalize_volume_rejects(volume):
+    with pytest.raises(ValueError):
+        _normalize_volume(volume, 'db', {'data'})
+
+
+def test_dependency_waves_order_services():
+    services = {'web': {'depends_on': ['api']}, 'api': {'depends_on': ['db']}, 'db': {'depends_on': []}, 'cache': {'depends_on': []}}
+    assert dependency_waves(services) == [['cache', 'db'], ['api'], ['web']]
+
+
+@pytest.mark.parametrize('services, message', [
+    ({'web': {'depends_on': ['missing']}}, 'unknown service'),
+    ({'a': {'depends_on': ['b']}, 'b': {'depends_on': ['a']}}, 'Circular dependency'),
+])
+def test_dependency_waves_rejects(services, message):
+    with pytest.raises(ValueError, match=message):
+        dependency_waves(services)
+
+
+def test_parse_compose_builds_plan():
+    plan = parse_compose(COMPOSE)
+    assert plan['project'] == 'demo'
+    assert plan['waves'] == [['db'], ['api'], ['web']]
+    assert plan['services']['api']['environment'] == {'PRICE': '$5'}
+    assert plan['volumes']['data']['name'] == 'demo_data'
+    assert plan['networks']['default']['name'] == 'demo_default'
+    assert parse_compose(COMPOSE, 'other')['project'] == 'other'
+
+
+@pytest.mark.parametrize('text, message', [
+    ('services: [', 'Invalid compose file'),
+    ('name: demo\nservices: {}', 'must define services'),
+    ('services:\n  web:\n    image: nginx', 'project name is required'),
+    ('name: demo\nservices:\n  web:\n    image: nginx:${TAG}', 'interpolation'),
+    ('name: demo\nservices:\n  web:\n    build: .', 'build is not supported'),
+    ('name: demo\nservices:\n  web:\n    image: nginx\n    privileged: true', 'unsupported keys privileged'),
+    ('name: demo\nservices:\n  web:\n    image: nginx\n    networks: [backend]', 'network backend is not declared'),
+])
+def test_parse_compose_rejects(text, message):
+    with pytest.raises(ValueError, match=message):
+        parse_compose(text)
+
+
+class RecordingApi:
+    def create_host_config(self, **kwargs):
+        self.host_config = kwargs
+        return kwargs
+
+    def create_endpoint_config(self, **kwargs):
+        return kwargs
+
+    def create_networking_config(self, config):
+        return config
+
+    def create_container(self, image, **kwargs):
+        return {'Id': 'abc'}
+
+    def start(self, container_id):
+        pass
+
+
+def test_random_host_port_keeps_host_ip():
+    client = type('Client', (), {'api': RecordingApi()})()
+    _create_service_container(client, parse_compose(COMPOSE), 'web')
+    bindings = convert_port_bindings(client.api.host_config['port_bindings'])
+    assert bindings == {'80/tcp': [{'HostIp': '127.0.0.1', 'HostPort': ''}]}
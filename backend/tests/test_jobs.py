@@ -0,0 +1,77 @@
+import threading
+
+from services.jobs import JobQueue
+
+
+def wait_finished(job, timeout=2):
+    job.future.result(timeout=timeout)
+    return job
+
+
+def test_create_jobs_do_not_wait_behind_builds():
+    queue = JobQueue()
+    queue.max_workers = 1
+    queue.dedicated_workers = {'create': 1}
+    release = threading.Event()
+
+    build = queue.submit('build', lambda job: release.wait(5))
+    create = queue.submit('create', lambda job: 'created')
+    try:
+        assert wait_finished(create).status == 'succeeded'
+        assert create.result == 'created'
+        assert not build.finished
+    finally:
+        release.set()
+    assert wait_finished(build).status == 'succeeded'
+
+
+def test_created_job_only_runs_once_started():
+    queue = JobQueue()
+    job = queue.create('compose')
+    assert queue.get(job.id) is job
+    assert job.status == 'queued' and job.future is None
+
+    queue.start(job, lambda job, value: value * 2, 21)
+    assert wait_finished(job).result == 42
+
+
+def test_cancel_runs_callbacks_to_unblock_a_running_job():
+    queue = JobQueue()
+    unblocked = threading.Event()
+    started = threading.Event()
+
+    def quiet_step(job):
+        job.on_cancel(unblocked.set)
+        started.set()
+        # Stands in for a read that only a cancel callback can interrupt.
+        unblocked.wait(5)
+        job.check_cancelled()
+
+    job = queue.submit('build', quiet_step)
+    assert started.wait(2)
+    queue.cancel(job.id)
+    assert wait_finished(job).status == 'cancelled'
+
+
+def test_on_cancel_after_cancel_runs_immediately():
+    queue = JobQueue()
+    job = queue.create('build')
+    queue.cancel(job.id)
+    calls = []
+    job.on_cancel(lambda: calls.append('aborted'))
+    assert calls == ['aborted']
+
+
+def test_listeners_hear_logs_and_status_changes():
+    queue = JobQueue()
+    job = queue.create('build')
+    calls = []
+    listener = lambda: calls.append(job.status)
+    job.add_listener(listener)
+
+    job.log("step 1")
+    job.set_status('succeeded')
+    job.remove_listener(listener)
+    job.log("after")
+
+    assert calls == ['queued', 'succeeded']
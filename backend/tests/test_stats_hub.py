@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from services.stats_hub import StatsCapacityError, StatsHub, StatsTable
+
+FRAME = {
+    'cpu_stats': {'cpu_usage': {'total_usage': 200}, 'system_cpu_usage': 2000, 'online_cpus': 1},
+    'precpu_stats': {'cpu_usage': {'total_usage': 100}, 'system_cpu_usage': 1000},
+    'memory_stats': {'usage': 100, 'limit': 1000},
+    'pids_stats': {'current': 1},
+}
+
+
+class FakeApi:
+    def __init__(self, stopped):
+        self._stopped = stopped
+
+    def stats(self, container_id, stream=True, decode=True):
+        while not self._stopped.is_set():
+            yield FRAME
+            time.sleep(0.01)
+
+
+class FakeClient:
+    def __init__(self, stopped):
+        self.api = FakeApi(stopped)
+
+    def close(self):
+        pass
+
+
+class FakeDockerManager:
+    def __init__(self):
+        self.stopped = threading.Event()
+
+    def create_stream_client(self):
+        return FakeClient(self.stopped)
+
+
+@pytest.fixture
+def hub():
+    docker_manager = FakeDockerManager()
+    hub = StatsHub(docker_manager)
+    hub.max_streams = 4
+    hub.viewer_reserve = 1
+    hub._table = StatsTable(hub.max_streams)
+    yield hub
+    docker_manager.stopped.set()
+
+
+def first_sample(subscriber):
+    return subscriber.get(timeout=2)
+
+
+def test_fleet_leaves_reserved_streams_for_viewers(hub):
+    untracked = hub.track_fleet([f"fleet{index}" for index in range(10)])
+    assert len(untracked) == 7
+
+    subscriber = hub.subscribe('viewer')
+    assert first_sample(subscriber)['container_id'] == 'viewer'
+
+
+def test_viewer_evicts_fleet_stream_when_full(hub):
+    hub.viewer_reserve = 0
+    assert hub.track_fleet([f"fleet{index}" for index in range(4)]) == []
+
+    # Every stats worker is busy, so a sample only arrives once the evicted
+    # stream has actually stopped.
+    subscriber = hub.subscribe('viewer')
+    assert first_sample(subscriber)['container_id'] == 'viewer'
+    assert len(hub._streams) == 4
+
+
+def test_viewer_refused_when_every_stream_is_watched(hub):
+    viewers = [hub.subscribe(f"viewer{index}") for index in range(4)]
+    for subscriber in viewers:
+        first_sample(subscriber)
+
+    with pytest.raises(StatsCapacityError):
+        hub.subscribe('one-too-many')
+
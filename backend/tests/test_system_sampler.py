@@ -0,0 +1,35 @@
+import pytest
+
+pytest.importorskip('psutil')
+
+from services.system_sampler import SystemSampler  # noqa: E402
+
+
+def test_latest_never_samples_on_the_caller_thread(monkeypatch):
+    sampler = SystemSampler()
+
+    def fail():
+        raise AssertionError("sampled outside the sampler thread")
+
+    monkeypatch.setattr(sampler, 'sample', fail)
+    assert sampler.latest(timeout=0) is None
+
+
+def test_first_sample_is_taken_on_start():
+    sampler = SystemSampler()
+    sampler.interval = 60
+    sampler.start()
+    try:
+        sample = sampler.latest(timeout=5)
+    finally:
+        sampler.stop()
+    assert sample is not None
+    assert 'system_load' in sample
+
+
+def test_average_rejects_counts_below_one():
+    sampler = SystemSampler()
+    with pytest.raises(ValueError):
+        sampler.average(0)
+    with pytest.raises(ValueError):
+        sampler.average(-3)
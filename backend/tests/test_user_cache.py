@@ -0,0 +1,33 @@
+from services.user_cache import UserCache
+
+
+def test_load_racing_an_invalidation_is_not_cached():
+    cache = UserCache()
+    loads = []
+
+    def stale_loader(username):
+        # The row is read, then the password changes before the load returns.
+        loads.append(username)
+        cache.invalidate(username)
+        return 'old-snapshot'
+
+    assert cache.get('admin', stale_loader) == 'old-snapshot'
+    assert cache.get('admin', lambda username: 'new-snapshot') == 'new-snapshot'
+    assert loads == ['admin']
+
+
+def test_clear_discards_in_flight_loads():
+    cache = UserCache()
+
+    def loader(username):
+        cache.clear()
+        return 'old-snapshot'
+
+    cache.get('admin', loader)
+    assert cache.get('admin', lambda username: 'new-snapshot') == 'new-snapshot'
+
+
+def test_fresh_entries_are_served_from_cache():
+    cache = UserCache()
+    cache.get('admin', lambda username: 'snapshot')
+    assert cache.get('admin', lambda username: 'other') == 'snapshot'
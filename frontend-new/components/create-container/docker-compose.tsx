@@ -23,6 +23,14 @@ import { Input } from '@/components/ui/input';
 import { Progress } from '@/components/ui/progress';
 
 const composeSchema = z.object({
+  projectName: z
+    .string()
+    .min(1, 'Project name is required')
+    .max(64, 'Project name must be at most 64 characters')
+    .regex(
+      /^[a-z0-9][a-z0-9_-]*$/,
+      'Use lowercase letters, digits, hyphens and underscores, starting with a letter or digit',
+    ),
   composeFile: z
     .instanceof(FileList)
     .refine(files => files.length > 0, 'Please select a compose file')
@@ -51,7 +59,9 @@ export default function DockerCompose() {
 
   const form = useForm<FormValues>({
     resolver: zodResolver(composeSchema),
-    defaultValues: {},
+    defaultValues: {
+      projectName: '',
+    },
   });
 
   const onSubmit = async (data: FormValues) => {
@@ -61,11 +71,11 @@ export default function DockerCompose() {
 
       const file = data.composeFile[0];
 
-      await containerApi.buildFromCompose(file, progress => {
+      await containerApi.buildFromCompose(file, data.projectName, progress => {
         setUploadProgress(progress);
       });
 
-      toast.success('Containers created successfully from compose file');
+      toast.success(`Deployment of project ${data.projectName} queued`);
       router.push('/dashboard/containers/manage');
     } catch (error: any) {
       console.error('Error creating containers from compose:', error);
@@ -86,6 +96,28 @@ export default function DockerCompose() {
         className="space-y-6"
         encType="multipart/form-data"
       >
+        <FormField
+          control={form.control}
+          name="projectName"
+          render={({ field }) => (
+            <FormItem>
+              <FormLabel>Project Name</FormLabel>
+              <FormControl>
+                <Input
+                  placeholder="my-stack"
+                  disabled={isSubmitting}
+                  {...field}
+                />
+              </FormControl>
+              <FormDescription>
+                Containers are grouped by project. Deploying to an existing
+                project updates its services in place.
+              </FormDescription>
+              <FormMessage />
+            </FormItem>
+          )}
+        />
+
         <FormField
           control={form.control}
           name="composeFile"
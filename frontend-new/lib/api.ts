@@ -190,11 +190,13 @@ export const containerApi = {
 
   buildFromCompose: async (
     file: File,
+    project: string,
     onProgress?: (progress: number) => void,
   ) => {
     try {
       const formData = new FormData();
       formData.append('composefile', file);
+      formData.append('project', project);
 
       const response = await api.post(
         '/api/containers/build/compose',